@@ -0,0 +1,129 @@
+import argparse
+import os
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from crossword import *
+from generate import CrosswordCreator
+
+
+def generate_batch(structures, vocabulary, count=1, processes=None,
+                   restart=100, output=None):
+    """
+    Generate `count` crosswords for each structure file in a pool of
+    processes, all sharing one indexed `vocabulary` (see
+    `Vocabulary.load`), which is sent once to each worker. Each puzzle for
+    a structure is searched with a different seed, restarting on the Luby
+    schedule scaled by `restart` nodes. If `output` is a directory, the
+    workers also save an image of each puzzle there, named after its
+    structure and seed.
+
+    Yield (structure, seed, assignment) for each puzzle as it completes,
+    where assignment is None if the structure has no solution.
+    """
+    executor = ProcessPoolExecutor(
+        processes, initializer=_init_worker,
+        initargs=(vocabulary, restart, output)
+    )
+    try:
+        futures = [
+            executor.submit(_generate, structure, seed)
+            for structure in structures
+            for seed in range(count)
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+# State shared by every puzzle generated in a worker process
+_worker = dict()
+
+
+def _init_worker(vocabulary, restart, output):
+    _worker.update(
+        vocabulary=vocabulary, restart=restart, output=output,
+        crosswords=dict()
+    )
+
+
+def _generate(structure, seed):
+    """Generate one puzzle. Runs in a worker process."""
+    crosswords = _worker["crosswords"]
+    if structure not in crosswords:
+        crosswords[structure] = Crossword(
+            structure, vocabulary=_worker["vocabulary"]
+        )
+    creator = CrosswordCreator(crosswords[structure], seed=seed)
+    assignment = creator.solve(restart=_worker["restart"])
+    if assignment is not None and _worker["output"] is not None:
+        filename = image_file(_worker["output"], structure, seed)
+        creator.save(assignment, filename)
+    return structure, seed, assignment
+
+
+def image_file(directory, structure, seed):
+    """
+    Return the path of the image of a puzzle generated for `structure`.
+    """
+    name = os.path.splitext(os.path.basename(structure))[0]
+    return os.path.join(directory, f"{name}-{seed}.png")
+
+
+def main():
+
+    # Parse command-line arguments
+    parser = argparse.ArgumentParser(
+        description="Generate many crosswords from one vocabulary."
+    )
+    parser.add_argument("words")
+    parser.add_argument("structures", nargs="+", metavar="structure")
+    parser.add_argument(
+        "-n", "--count", type=int, default=1,
+        help="number of puzzles to generate for each structure"
+    )
+    parser.add_argument(
+        "--processes", type=int,
+        help="number of worker processes (default: one per CPU)"
+    )
+    parser.add_argument(
+        "--index", metavar="FILE",
+        help="file in which to cache the indexed vocabulary"
+    )
+    parser.add_argument(
+        "--restart", type=int, default=100, metavar="NODES",
+        help="restart each search on the Luby schedule scaled by NODES"
+    )
+    parser.add_argument(
+        "--output", metavar="DIRECTORY",
+        help="directory in which to save an image of each puzzle"
+    )
+    args = parser.parse_args()
+
+    # Load and index the vocabulary once for every puzzle
+    vocabulary = Vocabulary.load(args.words, args.index)
+    creators = {
+        structure: CrosswordCreator(
+            Crossword(structure, vocabulary=vocabulary)
+        )
+        for structure in args.structures
+    }
+
+    # Print each puzzle as soon as it is generated, leaving the images to
+    # the workers
+    results = generate_batch(
+        args.structures, vocabulary, count=args.count,
+        processes=args.processes, restart=args.restart, output=args.output
+    )
+    for structure, seed, assignment in results:
+        name = os.path.splitext(os.path.basename(structure))[0]
+        print(f"{name} #{seed}")
+        if assignment is None:
+            print("No solution.")
+            continue
+        creators[structure].print(assignment)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+
+from crossword import *
+from generate import CrosswordCreator
+
+
+def lattice(height, width, seed=0):
+    """
+    Return the rows of a generated crossword structure.
+
+    Even rows hold across words broken up by random blocks; every fourth
+    column holds down words, broken up by a regular pattern of blocks. Runs
+    are kept to at least three cells, so that large grids do not need more
+    distinct two-letter words than a vocabulary has. Sizes one more than a
+    multiple of 4 (21, 41, 61, ...) give the most regular grids.
+    """
+    rng = random.Random(seed)
+    rows = []
+    for i in range(height):
+        if i % 2:
+            rows.append("".join(
+                "_" if j % 4 == 0 else "#" for j in range(width)
+            ))
+            continue
+
+        row = []
+        run = 0
+        for j in range(width):
+            if j % 4 == 0:
+
+                # Break down words every eight rows, except where that
+                # would leave a two-letter word at the top or bottom
+                blocked = (
+                    (i // 2 + j // 4) % 4 == 3
+                    and i not in (2, height - 3)
+                )
+                if blocked and run in (1, 2):
+                    row[-run:] = ["#"] * run
+            else:
+                blocked = (
+                    run >= 3
+                    and width - j - 1 not in (1, 2)
+                    and (run >= 7 or rng.random() < 0.25)
+                )
+            run = 0 if blocked else run + 1
+            row.append("#" if blocked else "_")
+        rows.append("".join(row))
+    return rows
+
+
+def run(structure, words, **options):
+    """
+    Solve a crossword with the given `CrosswordCreator` options.
+    Return the creator and whether a solution was found.
+    """
+    creator = CrosswordCreator(Crossword(structure, words), **options)
+    return creator, creator.solve() is not None
+
+
+def arc_consistency(structure, words):
+    """
+    Enforce arc consistency on a crossword from scratch. Return the
+    number of variables, the number of arcs revised and the seconds taken.
+    """
+    crossword = Crossword(structure, words)
+
+    # Time an uninstrumented solver, then count with an instrumented one
+    creator = CrosswordCreator(crossword)
+    start = time.perf_counter()
+    creator.ac3()
+    elapsed = time.perf_counter() - start
+
+    creator = CrosswordCreator(crossword, stats=True)
+    creator.ac3()
+    revised = creator.stats.counters["revise calls"]
+    return len(crossword.variables), revised, elapsed
+
+
+def main():
+
+    # Sizes of the generated grids to benchmark, in addition to the
+    # bundled structures
+    sizes = [int(arg) for arg in sys.argv[1:]] or [21, 41, 61, 101]
+
+    with tempfile.TemporaryDirectory() as directory:
+        puzzles = [
+            (f"structure{i}", os.path.join("data", f"structure{i}.txt"),
+             os.path.join("data", f"words{i}.txt"))
+            for i in range(3)
+        ]
+        for size in sizes:
+            structure = os.path.join(directory, f"lattice{size}.txt")
+            with open(structure, "w") as f:
+                f.write("\n".join(lattice(size, size, seed=size)))
+            puzzles.append((
+                f"{size}x{size}", structure, os.path.join("data", "words2.txt")
+            ))
+
+        print(f"{'puzzle':<12} {'variables':>9} {'revised':>9} "
+              f"{'seconds':>8}")
+        for name, structure, words in puzzles:
+            variables, revised, elapsed = arc_consistency(structure, words)
+            print(f"{name:<12} {variables:>9} {revised:>9} {elapsed:>8.3f}")
+        print()
+
+        print(f"{'puzzle':<12} {'ordering':<9} {'inference':<9} "
+              f"{'solved':<6} {'nodes':>7} {'backtracks':>10} {'seconds':>8}")
+        for (name, structure, words), ordering, inference in itertools.product(
+            puzzles, CrosswordCreator.ORDERINGS, ("forward", "mac")
+        ):
+            creator, solved = run(
+                structure, words, ordering=ordering, inference=inference
+            )
+            print(f"{name:<12} {ordering:<9} {inference:<9} "
+                  f"{'yes' if solved else 'no':<6} {creator.nodes:>7} "
+                  f"{creator.backtracks:>10} {creator.elapsed:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
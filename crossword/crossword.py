@@ -1,3 +1,8 @@
+import hashlib
+import os
+import pickle
+
+
 class Variable():
 
     ACROSS = "across"
@@ -35,9 +40,106 @@ class Variable():
         return f"Variable({self.i}, {self.j}, {direction}, {self.length})"
 
 
+class Vocabulary():
+
+    def __init__(self, words):
+        """
+        Index a set of words so that sets of words can be represented as
+        bitsets. Words are bucketed by length, and each bucket is kept in a
+        fixed order; bit k of a bitset for a given length stands for the
+        kth word of that length.
+        """
+        self.words = set(words)
+
+        # Words of each length, in bit order
+        self.buckets = dict()
+        for word in sorted(self.words):
+            self.buckets.setdefault(len(word), []).append(word)
+
+        # For each length, a list with one entry per position, mapping each
+        # letter to the bitset of words with that letter there
+        self.positions = dict()
+        for length, bucket in self.buckets.items():
+            positions = [dict() for _ in range(length)]
+            for index, word in enumerate(bucket):
+                bit = 1 << index
+                for k, letter in enumerate(word):
+                    positions[k][letter] = positions[k].get(letter, 0) | bit
+            self.positions[length] = positions
+
+        # Bit of each word within its bucket
+        self.bits = {
+            word: 1 << index
+            for bucket in self.buckets.values()
+            for index, word in enumerate(bucket)
+        }
+
+    @classmethod
+    def load(cls, words_file, index_file=None):
+        """
+        Load and index the vocabulary in `words_file`. If `index_file` is
+        given, the index is read from it when it was built from the same
+        contents as `words_file`, and written to it otherwise, so that it
+        only needs to be built once.
+        """
+        with open(words_file) as f:
+            contents = f.read()
+        digest = hashlib.sha256(contents.encode()).hexdigest()
+
+        # The index is stored along with a digest of the words it was
+        # built from, so that an index of another words file is rebuilt
+        if index_file is not None and os.path.exists(index_file):
+            with open(index_file, "rb") as f:
+                try:
+                    source, vocabulary = pickle.load(f)
+                except (pickle.UnpicklingError, EOFError,
+                        TypeError, ValueError):
+                    source = vocabulary = None
+            if source == digest and isinstance(vocabulary, cls):
+                return vocabulary
+
+        vocabulary = cls(contents.upper().splitlines())
+        if index_file is not None:
+            with open(index_file, "wb") as f:
+                pickle.dump((digest, vocabulary), f, pickle.HIGHEST_PROTOCOL)
+        return vocabulary
+
+    def full(self, length):
+        """Return the bitset of all words with the given length."""
+        return (1 << len(self.buckets.get(length, ()))) - 1
+
+    def mask(self, length, k, letter):
+        """Return the bitset of words of `length` with `letter` at `k`."""
+        positions = self.positions.get(length)
+        return positions[k].get(letter, 0) if positions else 0
+
+    def decode(self, length, bitset):
+        """Return the list of words of `length` in a bitset."""
+        bucket = self.buckets.get(length, ())
+        bits = bin(bitset)[:1:-1]
+        words = []
+        k = bits.find("1")
+        while k != -1:
+            words.append(bucket[k])
+            k = bits.find("1", k + 1)
+        return words
+
+
+class Overlaps(dict):
+    """Mapping of overlapping variable pairs that returns None for others."""
+
+    def __missing__(self, key):
+        return None
+
+
 class Crossword():
 
-    def __init__(self, structure_file, words_file):
+    def __init__(self, structure_file, words_file=None, vocabulary=None):
+        """
+        Load a crossword structure, with the vocabulary in `words_file`
+        or an already loaded `vocabulary`, which can be shared between
+        crosswords.
+        """
 
         # Determine structure of crossword
         with open(structure_file) as f:
@@ -58,8 +160,10 @@ class Crossword():
                 self.structure.append(row)
 
         # Save vocabulary list
-        with open(words_file) as f:
-            self.words = set(f.read().upper().splitlines())
+        if vocabulary is None:
+            vocabulary = Vocabulary.load(words_file)
+        self.vocabulary = vocabulary
+        self.words = vocabulary.words
 
         # Determine variable set
         self.variables = set()
@@ -104,30 +208,30 @@ class Crossword():
                             length=length
                         ))
 
+        # Index each cell by the variables that pass through it, along with
+        # the position of the cell within each variable
+        cell_variables = dict()
+        for var in self.variables:
+            for k, cell in enumerate(var.cells):
+                cell_variables.setdefault(cell, []).append((var, k))
+
         # Compute overlaps for each word
         # For any pair of variables v1, v2, their overlap is either:
         #    None, if the two variables do not overlap; or
         #    (i, j), where v1's ith character overlaps v2's jth character
-        self.overlaps = dict()
-        for v1 in self.variables:
-            for v2 in self.variables:
-                if v1 == v2:
-                    continue
-                cells1 = v1.cells
-                cells2 = v2.cells
-                intersection = set(cells1).intersection(cells2)
-                if not intersection:
-                    self.overlaps[v1, v2] = None
-                else:
-                    intersection = intersection.pop()
-                    self.overlaps[v1, v2] = (
-                        cells1.index(intersection),
-                        cells2.index(intersection)
-                    )
+        # Only overlapping pairs are stored; other pairs look up as None
+        self.overlaps = Overlaps()
+        adjacency = {var: set() for var in self.variables}
+        for shared in cell_variables.values():
+            for v1, i in shared:
+                for v2, j in shared:
+                    if v1 != v2:
+                        self.overlaps[v1, v2] = (i, j)
+                        adjacency[v1].add(v2)
+        self.adjacency = {
+            var: frozenset(neighbors) for var, neighbors in adjacency.items()
+        }
 
     def neighbors(self, var):
         """Given a variable, return set of overlapping variables."""
-        return set(
-            v for v in self.variables
-            if v != var and self.overlaps[v, var]
-        )
+        return self.adjacency[var]
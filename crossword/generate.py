@@ -1,21 +1,135 @@
+import argparse
+import collections
+import functools
+import heapq
+import itertools
+import multiprocessing
+import os
+import random
 import sys
-import copy
+import time
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 from crossword import *
+from render import renderer
+
+
+class SearchInterrupted(Exception):
+    """Raised inside `backtrack` to abandon the current search."""
+
+
+class SolverStats():
+    """
+    Counters and cumulative timers collected by a `CrosswordCreator`
+    created with `stats=True`. Timers are inclusive, so the time spent in
+    `revise` is also counted in the `ac3` that called it.
+    """
+
+    def __init__(self):
+        self.counters = collections.Counter()
+        self.timers = collections.Counter()
+
+    def __str__(self):
+        width = max(map(len, [*self.counters, *self.timers]), default=0)
+        lines = ["Counters:"]
+        for name, count in self.counters.items():
+            lines.append(f"  {name:<{width}} {count:>12}")
+        lines.append("Timers:")
+        for name, seconds in self.timers.items():
+            lines.append(f"  {name:<{width}} {seconds:>11.3f}s")
+        return "\n".join(lines)
 
 
 class CrosswordCreator():
 
-    def __init__(self, crossword):
+    # Inference run by `backtrack` after each tentative assignment
+    INFERENCES = (None, "forward", "mac")
+
+    # Heuristics for choosing the next variable to assign
+    ORDERINGS = ("mrv", "dom/wdeg")
+
+    def __init__(self, crossword, inference="mac", ordering="mrv", seed=None,
+                 stats=False):
         """
         Create new CSP crossword generate.
+
+        `inference` is None to only check consistency of each assignment,
+        "forward" for forward checking, or "mac" to maintain arc
+        consistency during the search.
+
+        `ordering` is "mrv" to choose the variable with the fewest remaining
+        values, breaking ties by degree, or "dom/wdeg" to divide the number
+        of remaining values by the weighted degree: the sum of the weights
+        of the variable's constraints with unassigned variables, where each
+        constraint's weight starts at 1 and counts the failures it has
+        caused (domain wipeouts, or conflicts with an assigned word).
+
+        If `seed` is given, ties between variables and between values are
+        broken randomly, so that restarts explore different parts of the
+        search space.
+
+        If `stats` is True, the solver collects counters and timers in
+        `self.stats` (see `SolverStats`). Otherwise `self.stats` is None
+        and the instrumentation is not installed at all.
         """
+        if inference not in CrosswordCreator.INFERENCES:
+            raise ValueError(f"unknown inference {inference!r}")
+        if ordering not in CrosswordCreator.ORDERINGS:
+            raise ValueError(f"unknown ordering {ordering!r}")
         self.crossword = crossword
-        self.domains = {
-            var: self.crossword.words.copy()
+        self.inference = inference
+        self.ordering = ordering
+
+        # Weight of each constraint between two variables, stored under
+        # both of them: overlaps start at 1, and pairs of words of the same
+        # length, which must differ, are only added once they cause a
+        # failure
+        self.weights = {
+            var: dict.fromkeys(self.crossword.neighbors(var), 1)
             for var in self.crossword.variables
         }
 
+        # Assignment being searched, whose variables no longer count
+        # towards the weighted degrees of their neighbors
+        self.assignment = dict()
+
+        # Heap of (priority, count, variable) entries used to select the
+        # next variable. Entries are pushed whenever a priority changes and
+        # are discarded lazily once stale, so the heap is rebuilt by
+        # `select_unassigned_variable` when it is None.
+        self.queue = None
+        self.counter = itertools.count()
+        self.random = random.Random(seed) if seed is not None else None
+
+        # Each domain is a bitset over the crossword's vocabulary words of
+        # the variable's length (see `Vocabulary`), with its size tracked
+        # alongside so it can be read without counting bits
+        self.domains = dict()
+        self.sizes = dict()
+        for var in self.crossword.variables:
+            self.set_domain(var, self.crossword.vocabulary.full(var.length))
+
+        # Stack of (variable, bitset, size) recording each domain before it
+        # was changed, so the search can undo its inferences by unwinding
+        self.trail = []
+
+        # Node count at which to abandon the current run of the search, and
+        # an event (such as a `multiprocessing.Event`) that stops the search
+        # once set, checked every `STOP_INTERVAL` nodes
+        self.limit = None
+        self.stop = None
+        self.stopped = False
+
+        # Search statistics
+        self.nodes = 0
+        self.backtracks = 0
+        self.restarts = 0
+        self.elapsed = 0
+        self.stats = None
+        if stats:
+            self.instrument()
+
     def letter_grid(self, assignment):
         """
         Return 2D array representing a given assignment.
@@ -49,52 +163,134 @@ class CrosswordCreator():
         """
         Save crossword assignment to an image file.
         """
-        from PIL import Image, ImageDraw, ImageFont
-        cell_size = 100
-        cell_border = 2
-        interior_size = cell_size - 2 * cell_border
-        letters = self.letter_grid(assignment)
-
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.crossword.width * cell_size,
-             self.crossword.height * cell_size),
-            "black"
+        renderer().save(
+            self.crossword.structure, self.letter_grid(assignment), filename
         )
-        font = ImageFont.truetype("assets/fonts/OpenSans-Regular.ttf", 80)
-        draw = ImageDraw.Draw(img)
 
-        for i in range(self.crossword.height):
-            for j in range(self.crossword.width):
-
-                rect = [
-                    (j * cell_size + cell_border,
-                     i * cell_size + cell_border),
-                    ((j + 1) * cell_size - cell_border,
-                     (i + 1) * cell_size - cell_border)
-                ]
-                if self.crossword.structure[i][j]:
-                    draw.rectangle(rect, fill="white")
-                    if letters[i][j]:
-                        w, h = draw.textsize(letters[i][j], font=font)
-                        draw.text(
-                            (rect[0][0] + ((interior_size - w) / 2),
-                             rect[0][1] + ((interior_size - h) / 2) - 10),
-                            letters[i][j], fill="black", font=font
-                        )
+    # Number of nodes between checks of the `stop` event
+    STOP_INTERVAL = 1024
 
-        img.save(filename)
+    # Number of selection queue entries per variable, most of them
+    # outdated, beyond which the queue is rebuilt
+    QUEUE_SLACK = 4
 
-    def solve(self):
+    def solve(self, restart=None):
         """
         Enforce node and arc consistency, and then solve the CSP.
+
+        If `restart` is a number of nodes, the search is restarted from
+        scratch after restart * luby(k) nodes on its kth run. Return None if
+        there is no solution or if the search was stopped through `stop`.
         """
+        start = time.perf_counter()
+        self.queue = None
+
+        # `backtrack` recurses once per assigned variable
+        depth = len(self.domains) + 1000
+        if sys.getrecursionlimit() < depth:
+            sys.setrecursionlimit(depth)
+
         self.enforce_node_consistency()
-        self.ac3()
-        x =  self.backtrack(dict())
-        print(f"{x}")
-        return x
+        assignment = None
+        consistent = self.ac3()
+        setup = time.perf_counter()
+        if consistent:
+            mark = len(self.trail)
+            for run in itertools.count(1):
+                if restart is not None:
+                    self.limit = self.nodes + restart * luby(run)
+                try:
+                    assignment = self.backtrack(dict())
+                    break
+                except SearchInterrupted:
+                    self.undo(mark)
+                    self.queue = None
+                    if self.stopped:
+                        break
+                    self.restarts += 1
+            self.limit = None
+        self.elapsed = time.perf_counter() - start
+
+        if self.stats is not None:
+            self.stats.timers["setup"] += setup - start
+            self.stats.timers["search"] += start + self.elapsed - setup
+            self.stats.counters.update(
+                nodes=self.nodes - self.stats.counters["nodes"],
+                backtracks=self.backtracks - self.stats.counters["backtracks"],
+                restarts=self.restarts - self.stats.counters["restarts"]
+            )
+        return assignment
+
+    def instrument(self):
+        """
+        Start collecting statistics in `self.stats`, by wrapping the
+        methods of this solver in ones that count and time their calls.
+        """
+        self.stats = SolverStats()
+        counters = self.stats.counters
+        timers = self.stats.timers
+
+        def timed(method):
+            name = method.__name__
+
+            @functools.wraps(method)
+            def wrapper(*args):
+                start = time.perf_counter()
+                try:
+                    return method(*args)
+                finally:
+                    timers[name] += time.perf_counter() - start
+                    counters[f"{name} calls"] += 1
+            return wrapper
+
+        revise = timed(self.revise)
+
+        @functools.wraps(revise)
+        def counting_revise(x, y):
+            size = self.sizes[x]
+            revised = revise(x, y)
+            if revised:
+                counters["revisions"] += 1
+                counters["pruned values"] += size - self.sizes[x]
+                if self.sizes[x] == 0:
+                    counters["wipeouts"] += 1
+            return revised
+
+        ac3 = timed(self.ac3)
+
+        @functools.wraps(ac3)
+        def counting_ac3(arcs=None):
+
+            # Every arc taken off the queue is one call to `revise`
+            if arcs is None:
+                counters["initial arcs"] += sum(
+                    len(self.crossword.neighbors(x)) for x in self.domains
+                )
+            else:
+                counters["initial arcs"] += len(arcs)
+            return ac3(arcs)
+
+        # Queue of arcs that records the longest any `ac3` queue has been
+        class ArcQueue(collections.deque):
+
+            def __init__(self, arcs):
+                super().__init__(arcs)
+                self.peak()
+
+            def append(self, arc):
+                super().append(arc)
+                self.peak()
+
+            def peak(self):
+                if len(self) > counters["peak arc queue"]:
+                    counters["peak arc queue"] = len(self)
+
+        self.revise = counting_revise
+        self.ac3 = counting_ac3
+        self.arc_queue = ArcQueue
+        for name in ("select_unassigned_variable", "order_domain_values",
+                     "infer", "undo"):
+            setattr(self, name, timed(getattr(self, name)))
 
     def enforce_node_consistency(self):
         """
@@ -103,13 +299,45 @@ class CrosswordCreator():
          constraints; in this case, the length of the word.)
         """
 
-        for var in self.domains:
-            words = copy.deepcopy(self.domains[var])
-            for word in words:    
-                # print(f"{var} with word {word}")
-                if var.length != len(word):
-                    self.domains[var].remove(word)
-        # raise NotImplementedError
+        # Domains only ever hold words of the variable's length, so they are
+        # node-consistent from the start
+
+    def set_domain(self, var, bitset):
+        """
+        Replace the domain of `var` with `bitset`, recording the old domain
+        on the trail.
+        """
+        if var in self.domains:
+            self.trail.append((var, self.domains[var], self.sizes[var]))
+        self.domains[var] = bitset
+        self.sizes[var] = bitset.bit_count()
+        if self.queue is not None:
+            self.schedule(var)
+
+    def undo(self, mark):
+        """
+        Restore every domain changed since the trail had length `mark`.
+        """
+        while len(self.trail) > mark:
+            var, bitset, size = self.trail.pop()
+            self.domains[var] = bitset
+            self.sizes[var] = size
+            if self.queue is not None:
+                self.schedule(var)
+
+    def domain_words(self, var):
+        """
+        Return the list of words in the domain of `var`.
+        """
+        return self.crossword.vocabulary.decode(var.length, self.domains[var])
+
+    def remove_value(self, var, word):
+        """
+        Remove `word` from the domain of `var`.
+        """
+        bit = self.crossword.vocabulary.bits.get(word, 0)
+        if len(word) == var.length and self.domains[var] & bit:
+            self.set_domain(var, self.domains[var] & ~bit)
 
     def revise(self, x, y):
         """
@@ -120,32 +348,47 @@ class CrosswordCreator():
         Return True if a revision was made to the domain of `x`; return
         False if no revision was made.
         """
-        revise = False
-
-        domainx = copy.deepcopy(self.domains[x])
-
-        for valx in domainx:
-            foundy = False
-            for valy in self.domains[y]:
-                if valx == valy:
-                    continue
-                if self.crossword.overlaps[x,y] != None :
-                    # print(f"{self.crossword.overlaps[x,y]}")
-                    if valx[self.crossword.overlaps[x,y][0]] != valy[self.crossword.overlaps[x,y][1]]:
-                        continue
-                foundy = True
-                break
-            if foundy == False:
-                revise = True
-                self.domains[x].remove(valx)
-
-        return revise        
-
-
-
-
+        overlap = self.crossword.overlaps[x, y]
+        if overlap is None:
+            return False
+        i, j = overlap
+
+        # A word for `x` is supported if some other word for `y` has the
+        # same letter at the overlap, which only depends on that letter
+        vocabulary = self.crossword.vocabulary
+        domain_x = self.domains[x]
+        domain_y = self.domains[y]
+        if not domain_x:
+            return False
+        pruned = domain_x
+        for letter, mask in vocabulary.positions[x.length][i].items():
+            words = domain_x & mask
+            if not words:
+                continue
+            support = domain_y & vocabulary.mask(y.length, j, letter)
+
+            # More than one supporting word
+            if support & (support - 1):
+                continue
+
+            # A single supporting word cannot support itself, since every
+            # word in the puzzle must be distinct
+            if support and x.length == y.length:
+                pruned &= ~(support & words)
+            elif not support:
+                pruned &= ~words
+
+        if pruned == domain_x:
+            return False
+        self.set_domain(x, pruned)
+        return True
 
-        # raise NotImplementedError
+    def arc_queue(self, arcs):
+        """
+        Return a queue holding `arcs`, from which `ac3` takes the arcs it
+        makes consistent.
+        """
+        return collections.deque(arcs)
 
     def ac3(self, arcs=None):
         """
@@ -157,27 +400,34 @@ class CrosswordCreator():
         return False if one or more domains end up empty.
         """
         if arcs == None:
-            arcs = []
-            for x in self.domains:
-                for y in self.domains:
-                    if x == y:
-                        continue
-                    if self.crossword.overlaps[x,y] != None and (x,y) not in arcs:
-                        arcs.append((x,y))
-
-        
-        while arcs != []:
-            (x,y) = arcs.pop(0)
-
-            if self.revise(x,y):
-                if len(self.domains[x]) == 0:
+            arcs = [
+                (x, y)
+                for x in self.domains
+                for y in self.crossword.neighbors(x)
+            ]
+
+        # Each arc is in the queue at most once
+        queue = self.arc_queue(dict.fromkeys(arcs))
+        queued = set(queue)
+
+        while queue:
+            x, y = queue.popleft()
+            queued.remove((x, y))
+
+            if self.revise(x, y):
+                if self.sizes[x] == 0:
+                    self.weigh(x, y)
                     return False
 
-                for var in self.domains:
-                    if var != x and self.crossword.overlaps[var,x] != None:
-                        arcs.append((var,x))
+                # Values removed from `x` had no support in `y`, so they
+                # supported nothing there either: only the other neighbors
+                # of `x` need to be revisited
+                for z in self.crossword.neighbors(x):
+                    if z != y and (z, x) not in queued:
+                        queued.add((z, x))
+                        queue.append((z, x))
 
-        return True      
+        return True
 
     def assignment_complete(self, assignment):
         """
@@ -197,20 +447,20 @@ class CrosswordCreator():
         puzzle without conflicting characters); return False otherwise.
         """
 
+        # All words must be distinct
+        if len(set(assignment.values())) != len(assignment):
+            return False
+
         for x in assignment:
             if x.length != len(assignment[x]):
                 return False
-            for y in assignment:
-                if assignment[x] == assignment[y] and x!=y:
-                    return False
-                if x!=y and self.crossword.overlaps[x,y] != None :
-                    if assignment[x][self.crossword.overlaps[x,y][0]] != assignment[y][self.crossword.overlaps[x,y][1]]:
+            for y in self.crossword.neighbors(x):
+                if y in assignment:
+                    i, j = self.crossword.overlaps[x, y]
+                    if assignment[x][i] != assignment[y][j]:
                         return False
         return True
 
-    def second(self,x):
-        return x[1]              
-
     def order_domain_values(self, var, assignment):
         """
         Return a list of values in the domain of `var`, in order by
@@ -218,21 +468,38 @@ class CrosswordCreator():
         The first value in the list, for example, should be the one
         that rules out the fewest values among the neighbors of `var`.
         """
-        sorted_domain={ word : 0 for word in self.domains[var]}
-        neighbours = []
-
-        for y in self.domains:
-            if y not in assignment and y!=var and self.crossword.overlaps[var,y] != None :
-                neighbours.append((y,self.crossword.overlaps[var,y][0],self.crossword.overlaps[var,y][1]))
-
-        for val in self.domains[var]:
-            for y, i, j in neighbours:
-                for word in self.domains[y]:
-                    if val[i] != word[j] or val == word:
-                        sorted_domain[val]+=1
-
-        return sorted(sorted_domain, key = self.second)                
-        # raise NotImplementedError
+        vocabulary = self.crossword.vocabulary
+        words = self.domain_words(var)
+        ruled_out = dict.fromkeys(words, 0)
+
+        # Sorting is stable, so shuffling first breaks ties randomly
+        if self.random is not None:
+            self.random.shuffle(words)
+
+        for y in self.crossword.neighbors(var):
+            if y in assignment:
+                continue
+            i, j = self.crossword.overlaps[var, y]
+            domain = self.domains[y]
+
+            # A value rules out every word for `y` without its letter at
+            # the overlap, which only depends on that letter
+            letters = dict()
+            for word in words:
+                letter = word[i]
+                if letter not in letters:
+                    support = domain & vocabulary.mask(y.length, j, letter)
+                    letters[letter] = self.sizes[y] - support.bit_count()
+                ruled_out[word] += letters[letter]
+
+            # Every word also rules itself out for `y`
+            if y.length == var.length:
+                shared = domain & self.domains[var]
+                for word in vocabulary.decode(y.length, shared):
+                    if word[i] == word[j]:
+                        ruled_out[word] += 1
+
+        return sorted(words, key=ruled_out.__getitem__)
 
     def select_unassigned_variable(self, assignment):
         """
@@ -241,27 +508,90 @@ class CrosswordCreator():
         in its domain. If there is a tie, choose the variable with the highest
         degree. If there is a tie, any of the tied variables are acceptable
         return values.
+
+        With the "dom/wdeg" ordering, the number of remaining values is
+        divided by the variable's weighted degree before comparing.
         """
-        min_vars = []
-        mini = 3000
-        for x in self.domains:
-            if x not in assignment:
-                if len(self.domains[x]) < mini:
-                    mini = len(self.domains[x])
-                    min_vars=[]
-                    min_vars.append(x)
-                elif self.domains[x] == mini:
-                    min_vars.append(x)
-
-        mini = 3000
-        select_var = None            
-
-        for var in min_vars:
-            if mini > len(self.crossword.neighbors(var)):
-                mini = len(self.crossword.neighbors(var))
-                select_var = var
-        return var
-        # raise NotImplementedError
+        self.assignment = assignment
+        if self.queue is None:
+            self.queue = []
+            for var in self.domains:
+                self.schedule(var)
+
+        # Discard entries for assigned variables or outdated priorities,
+        # leaving the best entry in place until its variable is assigned
+        while self.queue:
+            priority, _, var = self.queue[0]
+            if var not in assignment and priority == self.priority(var):
+                return var
+            heapq.heappop(self.queue)
+
+        # Variables unassigned behind the queue's back are still candidates
+        unassigned = [var for var in self.domains if var not in assignment]
+        if not unassigned:
+            return None
+        self.queue = None
+        return self.select_unassigned_variable(assignment)
+
+    def priority(self, var):
+        """
+        Return the key by which `var` is ordered for selection; lower keys
+        are selected first.
+        """
+        degree = len(self.crossword.neighbors(var))
+        if self.ordering == "dom/wdeg":
+            wdeg = sum(
+                weight for y, weight in self.weights[var].items()
+                if y not in self.assignment
+            )
+            return (self.sizes[var] / max(wdeg, 1), -degree)
+        return (self.sizes[var], -degree)
+
+    def schedule(self, var):
+        """
+        Push `var` onto the selection queue with its current priority.
+        Once outdated entries make the queue too long, rebuild it with one
+        entry per variable instead.
+        """
+        limit = CrosswordCreator.QUEUE_SLACK * len(self.domains)
+        if len(self.queue) < limit:
+            heapq.heappush(self.queue, self.entry(var))
+            return
+        self.queue = [self.entry(y) for y in self.domains]
+        heapq.heapify(self.queue)
+
+    def entry(self, var):
+        """
+        Return the selection queue entry for `var` with its current
+        priority.
+        """
+        if self.random is None:
+            tiebreak = next(self.counter)
+        else:
+            tiebreak = (self.random.random(), next(self.counter))
+        return (self.priority(var), tiebreak, var)
+
+    def weigh(self, x, y):
+        """
+        Record that the constraint between `x` and `y` caused a wipeout or
+        ruled out a value.
+        """
+        for var, other in ((x, y), (y, x)):
+            self.weights[var][other] = self.weights[var].get(other, 0) + 1
+            if self.queue is not None and self.ordering == "dom/wdeg":
+                self.schedule(var)
+
+    def schedule_partners(self, var):
+        """
+        With the "dom/wdeg" ordering, reschedule the unassigned variables
+        sharing a constraint with `var`, whose weighted degrees change when
+        `var` is assigned or unassigned.
+        """
+        if self.queue is None or self.ordering != "dom/wdeg":
+            return
+        for y in self.weights[var]:
+            if y not in self.assignment:
+                self.schedule(y)
 
     def backtrack(self, assignment):
         """
@@ -276,48 +606,239 @@ class CrosswordCreator():
             return assignment
 
         var = self.select_unassigned_variable(assignment)
-        # result = False
 
-        for val in self.order_domain_values(var,assignment):
+        for val in self.order_domain_values(var, assignment):
+            self.nodes += 1
+            self.check_interrupt()
+            if not self.consistent_value(var, val, assignment):
+                continue
+
+            # Try the value, undoing any inferences if it leads nowhere
+            mark = len(self.trail)
             assignment[var] = val
-            if self.consistent(assignment):           
+            self.schedule_partners(var)
+            if self.infer(var, val, assignment):
                 result = self.backtrack(assignment)
-                   
-                if result != None:
-                    return result            
-            assignment.pop(var)   
+                if result is not None:
+                    return result
+            self.undo(mark)
+            del assignment[var]
+            if self.queue is not None:
+                self.schedule(var)
+            self.schedule_partners(var)
+
+        self.backtracks += 1
+        return None
+
+    def check_interrupt(self):
+        """
+        Raise SearchInterrupted if the search has reached its node limit or
+        has been asked to stop.
+        """
+        if self.limit is not None and self.nodes >= self.limit:
+            raise SearchInterrupted()
+        if (self.stop is not None
+                and self.nodes % CrosswordCreator.STOP_INTERVAL == 0
+                and self.stop.is_set()):
+            self.stopped = True
+            raise SearchInterrupted()
+
+    def consistent_value(self, var, value, assignment):
+        """
+        Return True if assigning `value` to `var` is consistent with the
+        rest of `assignment`, only checking constraints that involve `var`.
+        """
+        if len(value) != var.length or value in assignment.values():
+            return False
+        for y in self.crossword.neighbors(var):
+            if y in assignment:
+                i, j = self.crossword.overlaps[var, y]
+                if value[i] != assignment[y][j]:
+                    self.weigh(var, y)
+                    return False
+        return True
 
-        return None        
+    def infer(self, var, value, assignment):
+        """
+        Propagate the assignment of `value` to `var` into the domains of
+        the unassigned variables, according to `self.inference`.
 
+        Return False if some domain ends up empty; return True otherwise.
+        """
+        if self.inference is None:
+            return True
 
+        vocabulary = self.crossword.vocabulary
+        bit = vocabulary.bits[value]
+        self.set_domain(var, bit)
 
+        # No other variable may use the same word
+        for y in self.domains:
+            if (y not in assignment and y.length == var.length
+                    and self.domains[y] & bit):
+                self.set_domain(y, self.domains[y] & ~bit)
+                if self.sizes[y] == 0:
+                    self.weigh(var, y)
+                    return False
 
-        # raise NotImplementedError
+        # Keep only the words that agree with `value` where they overlap
+        unassigned = [
+            y for y in self.crossword.neighbors(var) if y not in assignment
+        ]
+        if self.inference == "forward":
+            for y in unassigned:
+                i, j = self.crossword.overlaps[var, y]
+                mask = vocabulary.mask(y.length, j, value[i])
+                if self.domains[y] & ~mask:
+                    self.set_domain(y, self.domains[y] & mask)
+                    if self.sizes[y] == 0:
+                        self.weigh(var, y)
+                        return False
+            return True
 
+        return self.ac3([(y, var) for y in unassigned])
 
-def main():
+    def rates(self):
+        """
+        Return the nodes and backtracks per second of the last `solve`.
+        """
+        if not self.elapsed:
+            return 0.0, 0.0
+        return self.nodes / self.elapsed, self.backtracks / self.elapsed
+
+
+def luby(i):
+    """
+    Return the ith term, counting from 1, of the Luby sequence
+    1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8, ...
+    """
+    while True:
+        k = i.bit_length()
+        if i == (1 << k) - 1:
+            return 1 << (k - 1)
+        i -= (1 << (k - 1)) - 1
+
+
+def portfolio(crossword, processes=None, restart=100, seed=0):
+    """
+    Solve `crossword` by racing randomized search configurations in a pool
+    of processes, cycling through the variable orderings with a different
+    seed for each and restarting each on the Luby schedule scaled by
+    `restart` nodes. The other searches are stopped as soon as one of them
+    finishes.
+
+    Return the first solution found, or None if a search proved there is
+    none, along with the configuration of that search.
+    """
+    processes = processes or os.cpu_count()
+    configurations = [
+        dict(ordering=ordering, seed=seed + k)
+        for k, ordering in zip(
+            range(processes), itertools.cycle(CrosswordCreator.ORDERINGS)
+        )
+    ]
+
+    context = multiprocessing.get_context()
+    stop = context.Event()
+    executor = ProcessPoolExecutor(
+        processes, mp_context=context, initializer=_init_worker,
+        initargs=(crossword, restart, stop)
+    )
+    try:
+        futures = {
+            executor.submit(_solve_configuration, configuration): configuration
+            for configuration in configurations
+        }
 
-    # Check usage
-    if len(sys.argv) not in [3, 4]:
-        sys.exit("Usage: python generate.py structure words [output]")
+        # Searches only return early once stopped, so the first one to
+        # complete has either found a solution or proved there is none
+        future = next(as_completed(futures))
+        assignment = future.result()
+        stop.set()
+        return assignment, futures[future]
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+# State shared by every search run in a worker process
+_worker = dict()
+
+
+def _init_worker(crossword, restart, stop):
+    _worker.update(crossword=crossword, restart=restart, stop=stop)
+
+
+def _solve_configuration(configuration):
+    """Run one portfolio search. Runs in a worker process."""
+    creator = CrosswordCreator(_worker["crossword"], **configuration)
+    creator.stop = _worker["stop"]
+    return creator.solve(restart=_worker["restart"])
+
+
+def main():
 
     # Parse command-line arguments
-    structure = sys.argv[1]
-    words = sys.argv[2]
-    output = sys.argv[3] if len(sys.argv) == 4 else None
+    parser = argparse.ArgumentParser(
+        usage="python generate.py structure words [output]"
+    )
+    parser.add_argument("structure")
+    parser.add_argument("words")
+    parser.add_argument("output", nargs="?")
+    parser.add_argument(
+        "--ordering", choices=CrosswordCreator.ORDERINGS, default="mrv",
+        help="variable ordering heuristic"
+    )
+    parser.add_argument(
+        "--restart", type=int, metavar="NODES",
+        help="restart the search on the Luby schedule scaled by NODES"
+    )
+    parser.add_argument(
+        "--seed", type=int,
+        help="break ties randomly using this seed"
+    )
+    parser.add_argument(
+        "--portfolio", type=int, metavar="PROCESSES",
+        help="race randomized searches in this many processes"
+    )
+    parser.add_argument(
+        "--stats", action="store_true",
+        help="print search statistics"
+    )
+    args = parser.parse_args()
+    if args.portfolio and args.stats:
+        parser.error("--stats cannot be combined with --portfolio")
 
     # Generate crossword
-    crossword = Crossword(structure, words)
-    creator = CrosswordCreator(crossword)
-    assignment = creator.solve()
+    crossword = Crossword(args.structure, args.words)
+    creator = CrosswordCreator(
+        crossword, ordering=args.ordering, seed=args.seed, stats=args.stats
+    )
+    if args.portfolio:
+        assignment, configuration = portfolio(
+            crossword, processes=args.portfolio,
+            restart=args.restart or 100, seed=args.seed or 0
+        )
+    else:
+        assignment = creator.solve(restart=args.restart)
 
     # Print result
     if assignment is None:
         print("No solution.")
     else:
         creator.print(assignment)
-        if output:
-            creator.save(assignment, output)
+        if args.output:
+            creator.save(assignment, args.output)
+    if args.portfolio:
+        print(f"Portfolio winner: {configuration}")
+    elif args.stats:
+        nodes_rate, backtracks_rate = creator.rates()
+        print(
+            f"Searched {creator.nodes} nodes ({nodes_rate:.0f}/s), "
+            f"{creator.backtracks} backtracks ({backtracks_rate:.0f}/s), "
+            f"{creator.restarts} restarts in {creator.elapsed:.3f}s"
+        )
+        print(creator.stats)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,109 @@
+import functools
+import os
+
+# Font bundled with the crossword assets
+FONT = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "assets", "fonts", "OpenSans-Regular.ttf"
+)
+
+
+class Renderer():
+
+    def __init__(self, cell_size=100, cell_border=2, font=FONT, font_size=80):
+        """
+        Create a renderer for crossword images. The font is loaded once, and
+        each letter is rasterized once into a tile that is pasted into every
+        cell showing it, on top of a blank grid drawn once per structure.
+        """
+        from PIL import ImageFont
+        self.cell_size = cell_size
+        self.cell_border = cell_border
+        self.interior_size = cell_size - 2 * cell_border
+        self.font = ImageFont.truetype(font, font_size)
+
+        # Caches of letter -> tile and structure -> blank grid image
+        self.glyphs = dict()
+        self.templates = dict()
+
+    def glyph(self, letter):
+        """
+        Return the tile for the interior of a cell showing `letter`.
+        """
+        if letter not in self.glyphs:
+            from PIL import Image, ImageDraw
+
+            # Rectangles include both corners, so the interior of a cell
+            # is one pixel wider than `interior_size`
+            tile = Image.new(
+                "RGBA", (self.interior_size + 1, self.interior_size + 1),
+                "white"
+            )
+            draw = ImageDraw.Draw(tile)
+            _, _, w, h = draw.textbbox((0, 0), letter, font=self.font)
+            draw.text(
+                ((self.interior_size - w) / 2,
+                 (self.interior_size - h) / 2 - 10),
+                letter, fill="black", font=self.font
+            )
+            self.glyphs[letter] = tile
+        return self.glyphs[letter]
+
+    def template(self, structure):
+        """
+        Return the image of the blank grid for a crossword `structure`.
+        """
+        key = tuple(tuple(row) for row in structure)
+        if key not in self.templates:
+            from PIL import Image, ImageDraw
+            height = len(structure)
+            width = len(structure[0]) if structure else 0
+            img = Image.new(
+                "RGBA", (width * self.cell_size, height * self.cell_size),
+                "black"
+            )
+            draw = ImageDraw.Draw(img)
+            for i in range(height):
+                for j in range(width):
+                    if structure[i][j]:
+                        draw.rectangle(self.interior(i, j), fill="white")
+            self.templates[key] = img
+        return self.templates[key]
+
+    def interior(self, i, j):
+        """
+        Return the corners of the interior of cell (i, j).
+        """
+        return [
+            (j * self.cell_size + self.cell_border,
+             i * self.cell_size + self.cell_border),
+            ((j + 1) * self.cell_size - self.cell_border,
+             (i + 1) * self.cell_size - self.cell_border)
+        ]
+
+    def render(self, structure, letters):
+        """
+        Return an image of a crossword `structure` filled in with `letters`,
+        a 2D array of letters or None for each cell.
+        """
+        img = self.template(structure).copy()
+        for i, row in enumerate(letters):
+            for j, letter in enumerate(row):
+                if letter and structure[i][j]:
+                    img.paste(self.glyph(letter), self.interior(i, j)[0])
+        return img
+
+    def save(self, structure, letters, filename):
+        """
+        Save an image of a filled in crossword to `filename`.
+        """
+        self.render(structure, letters).save(filename)
+
+
+@functools.lru_cache(maxsize=None)
+def renderer():
+    """
+    Return a shared renderer with the default settings, created on first
+    use in each process.
+    """
+    return Renderer()
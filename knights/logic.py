@@ -1,7 +1,52 @@
 import itertools
+import multiprocessing
+import time
+import weakref
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 
 class Sentence():
+    """
+    Immutable logical sentence. Sentences are hash-consed: constructing a
+    sentence equal to an existing one returns that same object, so equality
+    is identity and hashes and symbol sets are computed once per node.
+    """
+
+    __slots__ = ("_args", "_hash", "_symbols", "__weakref__")
+
+    # Every live sentence, keyed by its class and constructor arguments
+    _interned = weakref.WeakValueDictionary()
+
+    def __new__(cls, *args):
+        key = (cls, args)
+        sentence = Sentence._interned.get(key)
+        if sentence is None:
+            cls.check(*args)
+            sentence = super().__new__(cls)
+            object.__setattr__(sentence, "_args", args)
+            object.__setattr__(sentence, "_hash", cls.compute_hash(*args))
+            object.__setattr__(
+                sentence, "_symbols", cls.compute_symbols(*args)
+            )
+            Sentence._interned[key] = sentence
+        return sentence
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("sentences are immutable")
+
+    def __reduce__(self):
+        # Re-intern on unpickling instead of restoring slots directly
+        return (type(self), self._args)
+
+    def __eq__(self, other):
+        return self is other
+
+    def __hash__(self):
+        return self._hash
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -12,8 +57,24 @@ class Sentence():
         return ""
 
     def symbols(self):
-        """Returns a set of all symbols in the logical sentence."""
-        return set()
+        """Returns a frozenset of all symbols in the logical sentence."""
+        return self._symbols
+
+    @classmethod
+    def check(cls, *operands):
+        """Validates constructor arguments before a new node is created."""
+        for operand in operands:
+            Sentence.validate(operand)
+
+    @classmethod
+    def compute_hash(cls, *operands):
+        """Computes the hash of a new node from its operands' hashes."""
+        return hash((cls.__name__.lower(), operands))
+
+    @classmethod
+    def compute_symbols(cls, *operands):
+        """Computes the symbols of a new node from its operands' symbols."""
+        return frozenset().union(*[operand._symbols for operand in operands])
 
     @classmethod
     def validate(cls, sentence):
@@ -43,15 +104,23 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ()
 
-    def __init__(self, name):
-        self.name = name
+    @classmethod
+    def check(cls, name):
+        pass
 
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+    @classmethod
+    def compute_hash(cls, name):
+        return hash(("symbol", name))
 
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    @classmethod
+    def compute_symbols(cls, name):
+        return frozenset((name,))
+
+    @property
+    def name(self):
+        return self._args[0]
 
     def __repr__(self):
         return self.name
@@ -65,20 +134,13 @@ class Symbol(Sentence):
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
-
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
+    __slots__ = ()
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
-
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    @property
+    def operand(self):
+        return self._args[0]
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -89,23 +151,13 @@ class Not(Sentence):
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
-
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
-        for conjunct in conjuncts:
-            Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
+    __slots__ = ()
 
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
-
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+    @property
+    def conjuncts(self):
+        return self._args
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,8 +166,15 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        """Sentences are immutable; see `with_conjunct`."""
+        raise AttributeError(
+            "sentences are immutable; use with_conjunct to extend a "
+            "conjunction"
+        )
+
+    def with_conjunct(self, conjunct):
+        """Returns a new conjunction with conjunct appended."""
+        return And(*self.conjuncts, conjunct)
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
@@ -126,23 +185,13 @@ class And(Sentence):
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
-
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
-        for disjunct in disjuncts:
-            Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+    __slots__ = ()
 
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+    @property
+    def disjuncts(self):
+        return self._args
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -157,24 +206,21 @@ class Or(Sentence):
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
-
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
-        Sentence.validate(antecedent)
-        Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+    __slots__ = ()
 
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+    @classmethod
+    def compute_hash(cls, antecedent, consequent):
+        return hash(("implies", antecedent._hash, consequent._hash))
 
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    @property
+    def antecedent(self):
+        return self._args[0]
+
+    @property
+    def consequent(self):
+        return self._args[1]
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -188,24 +234,17 @@ class Implication(Sentence):
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
-
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
-        Sentence.validate(left)
-        Sentence.validate(right)
-        self.left = left
-        self.right = right
+    __slots__ = ()
 
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+    @property
+    def left(self):
+        return self._args[0]
 
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    @property
+    def right(self):
+        return self._args[1]
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -221,18 +260,25 @@ class Biconditional(Sentence):
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
 
+def model_check(knowledge, query, processes=None, stats=None):
+    """
+    Checks if knowledge base entails query.
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    If processes is given, the models are partitioned across that many
+    worker processes, which stop as soon as any of them finds a model of
+    the knowledge base in which query is false. If stats is a dict, it is
+    filled with the number of models checked, the elapsed seconds and the
+    throughput in models per second.
+    """
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
+        nonlocal checked
 
         # If model has an assignment for each symbol
         if not symbols:
+            checked += 1
 
             # If knowledge base is true in model, then query must also be true
             if knowledge.evaluate(model):
@@ -256,8 +302,164 @@ def model_check(knowledge, query):
             return (check_all(knowledge, query, remaining, model_true) and
                     check_all(knowledge, query, remaining, model_false))
 
-    # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
-
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    start = time.perf_counter()
+    checked = 0
+
+    if processes:
+        result, checked = parallel_check(knowledge, query, processes)
+    else:
+
+        # Get all symbols in both knowledge and query
+        symbols = set(knowledge.symbols() | query.symbols())
+
+        # Check that knowledge entails query
+        result = check_all(knowledge, query, symbols, dict())
+
+    if stats is not None:
+        elapsed = time.perf_counter() - start
+        stats["models"] = checked
+        stats["seconds"] = elapsed
+        stats["models_per_second"] = checked / elapsed if elapsed else 0.0
+    return result
+
+
+def parallel_check(knowledge, query, processes):
+    """
+    Checks if knowledge base entails query using a pool of processes.
+    Returns whether the query is entailed and how many models were checked.
+    """
+
+    # Fix the first k symbols to split the models into 2^k partitions,
+    # enough to give each worker a few of them to balance the load
+    symbols = sorted(knowledge.symbols() | query.symbols())
+    k = min(len(symbols), (4 * processes - 1).bit_length())
+    prefixes = itertools.product((True, False), repeat=k)
+
+    context = multiprocessing.get_context()
+    found = context.Event()
+    entailed = True
+    checked = 0
+
+    executor = ProcessPoolExecutor(
+        processes, mp_context=context, initializer=_init_worker,
+        initargs=(knowledge, query, symbols, k, found)
+    )
+    try:
+        futures = [
+            executor.submit(_check_partition, prefix) for prefix in prefixes
+        ]
+        for future in as_completed(futures):
+            holds, count = future.result()
+            checked += count
+
+            # A counter-model settles it: stop the other workers
+            if not holds:
+                entailed = False
+                found.set()
+                break
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    return entailed, checked
+
+
+# State shared by every partition checked in a worker process
+_worker = dict()
+
+
+def _init_worker(knowledge, query, symbols, k, found):
+    _worker.update(
+        knowledge=knowledge, query=query, fixed=symbols[:k],
+        free=symbols[k:], found=found
+    )
+
+
+def _check_partition(prefix):
+    """Checks every model that extends prefix. Runs in a worker process."""
+    knowledge = _worker["knowledge"]
+    query = _worker["query"]
+    free = _worker["free"]
+    found = _worker["found"]
+
+    model = dict(zip(_worker["fixed"], prefix))
+    count = 0
+    for values in itertools.product((True, False), repeat=len(free)):
+
+        # Give up early once another worker has found a counter-model
+        if count % 1024 == 0 and found.is_set():
+            break
+
+        model.update(zip(free, values))
+        count += 1
+        if knowledge.evaluate(model) and not query.evaluate(model):
+            return False, count
+    return True, count
+
+
+class KnowledgeBase():
+    """
+    Knowledge base that accepts sentences incrementally and caches the
+    models satisfying them, so that many queries can be answered without
+    re-enumerating every model for each one.
+    """
+
+    def __init__(self, *sentences):
+
+        # Sentences added so far, and the symbols they mention
+        self.sentences = []
+        self.symbols = set()
+
+        # Every assignment to `symbols` in which all sentences are true
+        self.models = [dict()]
+
+        # Cache of query -> whether the knowledge base entails it
+        self.entailed = dict()
+
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """Adds a sentence, updating the cached models and entailments."""
+        Sentence.validate(sentence)
+        self.sentences.append(sentence)
+
+        # Extend each model over any symbols the knowledge base has not yet
+        # seen, keeping only the extensions where the new sentence holds
+        new_symbols = sorted(sentence.symbols() - self.symbols)
+        self.symbols.update(new_symbols)
+        self.models = [
+            model for model in self._extend(self.models, new_symbols)
+            if sentence.evaluate(model)
+        ]
+
+        # Entailment is monotonic: adding knowledge can only turn
+        # non-entailed queries into entailed ones, so keep the positives
+        self.entailed = {
+            query: result for query, result in self.entailed.items() if result
+        }
+
+    def entails(self, query):
+        """Checks if knowledge base entails query, using the cache."""
+        Sentence.validate(query)
+        if query not in self.entailed:
+            extra = sorted(query.symbols() - self.symbols)
+            self.entailed[query] = all(
+                query.evaluate(model)
+                for model in self._extend(self.models, extra)
+            )
+        return self.entailed[query]
+
+    def satisfiable(self):
+        """Returns True if some model makes every sentence true."""
+        return len(self.models) > 0
+
+    @staticmethod
+    def _extend(models, symbols):
+        """Yields every extension of each model over additional symbols."""
+        if not symbols:
+            yield from models
+            return
+        for model in models:
+            for values in itertools.product((True, False), repeat=len(symbols)):
+                extended = model.copy()
+                extended.update(zip(symbols, values))
+                yield extended
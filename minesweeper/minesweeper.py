@@ -1,6 +1,8 @@
 import itertools
 import random
 
+from collections import deque
+
 
 class Minesweeper():
     """
@@ -158,26 +160,110 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Safe cells that have not been clicked on yet
+        self.safe_moves = set()
+
+        # Sentences about the game known to be true, by their cells, and
+        # the cells of the sentences that each cell appears in
+        self.knowledge = dict()
+        self.index = dict()
+
+        # Cells of new sentences, not yet used to draw inferences
+        self.queue = deque()
 
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
+        if cell in self.mines:
+            return
         self.mines.add(cell)
-        for sentence in self.knowledge:
+        for sentence in self.remove_sentences(cell):
             sentence.mark_mine(cell)
+            self.add_sentence(sentence)
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
         """
+        if cell in self.safes:
+            return
         self.safes.add(cell)
-        for sentence in self.knowledge:
+        if cell not in self.moves_made:
+            self.safe_moves.add(cell)
+        for sentence in self.remove_sentences(cell):
             sentence.mark_safe(cell)
+            self.add_sentence(sentence)
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base, unless it is empty or
+        already known, and queues it to draw inferences from.
+        """
+        cells = frozenset(sentence.cells)
+        if not cells or cells in self.knowledge:
+            return
+        self.knowledge[cells] = sentence
+        for cell in cells:
+            self.index.setdefault(cell, set()).add(cells)
+        self.queue.append(cells)
+
+    def remove_sentences(self, cell):
+        """
+        Removes the sentences about a cell from the knowledge base,
+        and returns them.
+        """
+        sentences = []
+        for cells in self.index.pop(cell, ()):
+            sentences.append(self.knowledge.pop(cells))
+            for other in cells:
+                if other != cell:
+                    self.index[other].discard(cells)
+        return sentences
+
+    def infer(self):
+        """
+        Draws inferences from queued sentences until no more can be
+        drawn. Marks the cells of sentences with no mines as safe, and
+        of sentences with only mines as mines; marking a cell replaces
+        the sentences about it, which are queued again. Otherwise, a
+        sentence is compared with the other sentences about its cells,
+        and whenever the cells of one are a subset of the other's, the
+        difference between them is added as a new sentence.
+        """
+        while self.queue:
+            cells = self.queue.popleft()
+            sentence = self.knowledge.get(cells)
+
+            # Skip sentences replaced since they were queued
+            if sentence is None:
+                continue
+
+            if sentence.count == 0:
+                for cell in cells:
+                    self.mark_safe(cell)
+                continue
+            if sentence.count == len(cells):
+                for cell in cells:
+                    self.mark_mine(cell)
+                continue
+
+            others = set()
+            for cell in cells:
+                others |= self.index[cell]
+            others.discard(cells)
+            for other in others:
+                count = self.knowledge[other].count
+                if other < cells:
+                    self.add_sentence(
+                        Sentence(cells - other, sentence.count - count)
+                    )
+                elif cells < other:
+                    self.add_sentence(
+                        Sentence(other - cells, count - sentence.count)
+                    )
 
     def add_knowledge(self, cell, count):
         """
@@ -195,9 +281,11 @@ class MinesweeperAI():
                if they can be inferred from existing knowledge
         """
         self.moves_made.add(cell)
+        self.safe_moves.discard(cell)
         self.mark_safe(cell)
-        n= set()
-        c= count
+
+        # Loop over all cells within one row and column
+        cells = set()
         for i in range(cell[0] - 1, cell[0] + 2):
             for j in range(cell[1] - 1, cell[1] + 2):
 
@@ -205,40 +293,16 @@ class MinesweeperAI():
                 if (i, j) == cell:
                     continue
 
-                # Update count if cell in bounds and is mine
+                # Keep cells in bounds whose contents are unknown,
+                # counting only the mines among them
                 if 0 <= i < self.height and 0 <= j < self.width:
                     if (i, j) in self.mines:
-                        c-=1
-                    elif (i, j) in self.safes:
-                        continue
-                    else:
-                        n.add((i, j))
-        sen= Sentence(n, c)
-        if sen not in self.knowledge:
-            self.knowledge.append(sen)
-        for s in self.knowledge:
-            if s.count== 0:
-                c= set()
-                for a in s.cells:
-                    c.add(a)
-                for c1 in c:
-                    self.mark_safe(c1)
-            elif s.count== len(s.cells):
-                c= set()
-                for a in s.cells:
-                    c.add(a)
-                for c1 in c:
-                    self.mark_mine(c1)
-        for s1 in self.knowledge:
-            for s2 in self.knowledge:
-                if s2== s1:
-                    continue
-                elif s2.cells.issubset(s1.cells):
-                    s= Sentence(s1.cells- s2.cells, s1.count- s2.count)
-                    if s not in self.knowledge:
-                        self.knowledge.append(s)
-
+                        count -= 1
+                    elif (i, j) not in self.safes:
+                        cells.add((i, j))
 
+        self.add_sentence(Sentence(cells, count))
+        self.infer()
 
     def make_safe_move(self):
         """
@@ -249,11 +313,9 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        for cell in self.safes:
-            if cell not in self.moves_made:
-                return cell
+        for cell in self.safe_moves:
+            return cell
         return None
-        raise NotImplementedError
 
     def make_random_move(self):
         """
@@ -262,15 +324,11 @@ class MinesweeperAI():
             1) have not already been chosen, and
             2) are not known to be mines
         """
-        all_cells = set()
-        for i in range(self.width):
-            for j in range(self.height):
-                all_cells.add((i,j))
-        r= []
-        for cell in all_cells:
-            if cell not in self.moves_made and cell not in self.mines:
-                r.append(cell)   
-        if len(r)!=0:
+        r = []
+        for i in range(self.height):
+            for j in range(self.width):
+                if (i, j) not in self.moves_made and (i, j) not in self.mines:
+                    r.append((i, j))
+        if len(r) != 0:
             return random.choice(r)
         return None
-        raise NotImplementedError
\ No newline at end of file
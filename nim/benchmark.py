@@ -0,0 +1,160 @@
+import random
+import sys
+import time
+
+from nim import (
+    Nim, NimAI, optimal_action, train_game, train_parallel, winning, MERGES
+)
+
+# Initial piles on which to compare canonical and plain states, each a
+# loss for the first player
+CONFIGURATIONS = [[1, 3, 5, 7], [2, 4, 6, 6, 4, 2], [1, 2, 3, 4, 5, 6, 7]]
+
+# Initial piles too large to learn completely, on which to measure the AI
+# against the exact solver
+LARGE_CONFIGURATIONS = [[20] * 6, [50] * 10]
+
+
+def win_rate(ai, games=1000, seed=0, initial=None):
+    """
+    Return the fraction of `games` the AI wins as the second player
+    against an opponent playing `optimal_action`, who moves at random
+    when every action loses. The `initial` piles (Nim's default piles
+    by default) must be a loss for the first player, so that a perfect
+    AI wins every game.
+    """
+    rng = random.Random(seed)
+    wins = 0
+    for _ in range(games):
+        game = Nim(initial)
+        while game.winner is None:
+            if game.player == 0:
+                action = optimal_action(game.piles) or rng.choice(
+                    sorted(Nim.available_actions(game.piles))
+                )
+            else:
+                action = ai.choose_action(game.piles, epsilon=False)
+            game.move(action)
+        wins += game.winner == 1
+    return wins / games
+
+
+def accuracy(ai, games=200, seed=0, initial=None):
+    """
+    Play `games` games as in `win_rate`, and return the fraction of the
+    AI's moves from winning states that leave a losing state for its
+    opponent, as judged by `winning`.
+    """
+    rng = random.Random(seed)
+    optimal = moves = 0
+    for _ in range(games):
+        game = Nim(initial)
+        while game.winner is None:
+            if game.player == 0:
+                action = optimal_action(game.piles) or rng.choice(
+                    sorted(Nim.available_actions(game.piles))
+                )
+            else:
+                action = ai.choose_action(game.piles, epsilon=False)
+                if winning(game.piles):
+                    moves += 1
+                    i, j = action
+                    piles = game.piles.copy()
+                    piles[i] -= j
+                    optimal += not winning(piles)
+            game.move(action)
+    return optimal / moves if moves else 1
+
+
+def convergence(initial, canonical, chunk=500, limit=50000, target=0.99):
+    """
+    Train an AI on the `initial` piles `chunk` games at a time, until
+    it wins `target` of its games in `win_rate` or has played `limit`
+    games. Return the number of games played and the AI.
+    """
+    random.seed(0)
+    ai = NimAI(canonical=canonical)
+    games = 0
+    while games < limit:
+        for _ in range(chunk):
+            train_game(ai, initial)
+        games += chunk
+        if win_rate(ai, 200, initial=initial) >= target:
+            break
+    return games, ai
+
+
+def table_bytes(q):
+    """
+    Return the approximate number of bytes taken by a Q-table.
+    """
+    size = sys.getsizeof(q)
+    for state, values in q.items():
+        size += sys.getsizeof(state) + sys.getsizeof(values)
+        for action, value in values.items():
+            size += sys.getsizeof(action) + sys.getsizeof(value)
+    return size
+
+
+def main():
+
+    # Numbers of workers to benchmark, one per CPU by default
+    workers = [int(arg) for arg in sys.argv[1:]] or [1, 2, 4]
+    games = [1000, 4000, 16000]
+
+    print(f"{'workers':>7} {'merge':<7} {'games':>6} {'seconds':>8} "
+          f"{'win rate':>8}")
+    for processes in workers:
+        for merge in MERGES:
+            for n in games:
+                start = time.perf_counter()
+                ai = train_parallel(n, processes, merge=merge, seed=0)
+                elapsed = time.perf_counter() - start
+                print(f"{processes:>7} {merge:<7} {n:>6} {elapsed:>8.2f} "
+                      f"{win_rate(ai):>8.1%}")
+    print()
+
+    print(f"{'piles':<22} {'canonical':<9} {'games':>6} {'seconds':>8} "
+          f"{'states':>7} {'q-values':>8} {'bytes':>9}")
+    for initial in CONFIGURATIONS:
+        for canonical in (False, True):
+            start = time.perf_counter()
+            games, ai = convergence(initial, canonical)
+            elapsed = time.perf_counter() - start
+            values = sum(len(values) for values in ai.q.values())
+            print(f"{str(initial):<22} {'yes' if canonical else 'no':<9} "
+                  f"{games:>6} {elapsed:>8.2f} {len(ai.q):>7} {values:>8} "
+                  f"{table_bytes(ai.q):>9}")
+    print()
+
+    # Time the exact solver on random states, then measure canonical AIs
+    # trained on large configurations against it
+    rng = random.Random(0)
+    states = [[rng.randrange(51) for _ in range(10)] for _ in range(100000)]
+    start = time.perf_counter()
+    for piles in states:
+        optimal_action(piles)
+    elapsed = time.perf_counter() - start
+    print(f"Solver: {len(states) / elapsed:.0f} states/s on 10 piles of "
+          f"up to 50")
+    print(f"{'piles':<22} {'games':>6} {'seconds':>8} {'states':>7} "
+          f"{'win rate':>8} {'accuracy':>8}")
+    for initial in LARGE_CONFIGURATIONS:
+        random.seed(0)
+        ai = NimAI(canonical=True)
+        name = f"{len(initial)} piles of {initial[0]}"
+        trained = 0
+        elapsed = 0
+        for games in (1000, 2000, 4000):
+            start = time.perf_counter()
+            while trained < games:
+                train_game(ai, initial)
+                trained += 1
+            elapsed += time.perf_counter() - start
+            print(f"{name:<22} {games:>6} {elapsed:>8.2f} {len(ai.q):>7} "
+                  f"{win_rate(ai, 200, initial=initial):>8.1%} "
+                  f"{accuracy(ai, 200, initial=initial):>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,29 @@
 import math
+import os
 import random
+import struct
+import sys
 import time
 
+from array import array
+
+from concurrent.futures import ProcessPoolExecutor
+
 
 class Nim():
 
-    def __init__(self, initial=[1, 3, 5, 7]):
+    def __init__(self, initial=None):
         """
-        Initialize game board.
+        Initialize game board, starting from any number of piles of
+        any sizes given by `initial` (by default, [1, 3, 5, 7]).
         Each game board has
             - `piles`: a list of how many elements remain in each pile
             - `player`: 0 or 1 to indicate which player's turn
             - `winner`: None, 0, or 1 to indicate who the winner is
         """
-        self.piles = initial.copy()
+        self.piles = [1, 3, 5, 7] if initial is None else list(initial)
+        if any(pile < 0 for pile in self.piles):
+            raise Exception("Invalid pile")
         self.player = 0
         self.winner = None
 
@@ -21,16 +31,28 @@ class Nim():
     def available_actions(cls, piles):
         """
         Nim.available_actions(piles) takes a `piles` list as input
-        and returns all of the available actions `(i, j)` in that state.
+        and returns an iterator over all of the available actions
+        `(i, j)` in that state, generated as they are needed.
 
         Action `(i, j)` represents the action of removing `j` items
         from pile `i` (where piles are 0-indexed).
         """
-        actions = set()
         for i, pile in enumerate(piles):
-            for j in range(1, piles[i] + 1):
-                actions.add((i, j))
-        return actions
+            for j in range(1, pile + 1):
+                yield (i, j)
+
+    @classmethod
+    def random_action(cls, piles):
+        """
+        Nim.random_action(piles) returns one of the available actions
+        in the state `piles`, chosen uniformly at random, without
+        generating the others.
+        """
+        j = random.randrange(sum(piles)) + 1
+        for i, pile in enumerate(piles):
+            if j <= pile:
+                return (i, j)
+            j -= pile
 
     @classmethod
     def other_player(cls, player):
@@ -70,21 +92,55 @@ class Nim():
             self.winner = self.player
 
 
+# Start of every Q-table snapshot file, and version of its format
+SNAPSHOT_MAGIC = b"NIMQ"
+SNAPSHOT_VERSION = 2
+
+
 class NimAI():
 
-    def __init__(self, alpha=0.5, epsilon=0.1):
+    def __init__(self, alpha=0.5, epsilon=0.1, canonical=False):
         """
         Initialize AI with an empty Q-learning dictionary,
         an alpha (learning) rate, and an epsilon rate.
 
-        The Q-learning dictionary maps `(state, action)`
-        pairs to a Q-value (a number).
+        The Q-learning dictionary maps each `state` to a dictionary
+        from `action` to a Q-value (a number), so that the actions of
+        a state can be looked up without scanning the whole table.
          - `state` is a tuple of remaining piles, e.g. (1, 1, 4, 4)
          - `action` is a tuple `(i, j)` for an action
+        Pairs that have no Q-value yet are missing from the table.
+
+        If `canonical` is True, states that differ only in the order of
+        their piles share their Q-values: each state is stored with its
+        piles sorted, and each action `(i, j)` as `(k, j)` where `k` is
+        the position of pile `i` once sorted.
         """
         self.q = dict()
         self.alpha = alpha
         self.epsilon = epsilon
+        self.canonical = canonical
+
+    def key(self, state):
+        """
+        Return the key of the state `state` in `self.q`, along with
+        the indices of its piles in the order of the key (None if
+        states are not canonical).
+        """
+        if not self.canonical:
+            return tuple(state), None
+        order = sorted(range(len(state)), key=state.__getitem__)
+        return tuple(state[i] for i in order), order
+
+    def action_key(self, order, action):
+        """
+        Return the key in `self.q` of the action `action`, in a state
+        whose piles are in `order` in its key.
+        """
+        if order is None:
+            return action
+        i, j = action
+        return (order.index(i), j)
 
     def update(self, old_state, action, new_state, reward):
         """
@@ -101,13 +157,11 @@ class NimAI():
         Return the Q-value for the state `state` and the action `action`.
         If no Q-value exists yet in `self.q`, return 0.
         """
-        t_state = tuple(state)
-
-        if (t_state,action) in self.q:
-            return self.q[(t_state,action)]
-        return 0    
-
-        # raise NotImplementedError
+        key, order = self.key(state)
+        values = self.q.get(key)
+        if values is None:
+            return 0
+        return values.get(self.action_key(order, action), 0)
 
     def update_q_value(self, state, action, old_q, reward, future_rewards):
         """
@@ -124,13 +178,11 @@ class NimAI():
         `alpha` is the learning rate, and `new value estimate`
         is the sum of the current reward and estimated future rewards.
         """
-
-        q_val = self.get_q_value(state, action)
-        t_state = tuple(state)
-        
-        self.q[(t_state,action)] = q_val + self.alpha*(future_rewards + reward - q_val)
-
-        # raise NotImplementedError
+        key, order = self.key(state)
+        values = self.q.setdefault(key, dict())
+        values[self.action_key(order, action)] = old_q + self.alpha * (
+            reward + future_rewards - old_q
+        )
 
     def best_future_reward(self, state):
         """
@@ -142,17 +194,15 @@ class NimAI():
         Q-value in `self.q`. If there are no available actions in
         `state`, return 0.
         """
-        maxi = -10000
-        found = False
-        for s_a in self.q:
-            if tuple(state) == s_a[0] and self.q[s_a] > maxi:
-                maxi = self.q[s_a]
-                found = True 
-        if found == False:
+        values = self.q.get(self.key(state)[0])
+        if not values:
             return 0
-        else:
-            return maxi            
-        # raise NotImplementedError
+        best = max(values.values())
+
+        # Actions without a Q-value count as 0
+        if len(values) < sum(state):
+            best = max(best, 0)
+        return best
 
     def choose_action(self, state, epsilon=True):
         """
@@ -169,93 +219,546 @@ class NimAI():
         If multiple actions have the same Q-value, any of those
         options is an acceptable return value.
         """
-        # print(f"{self.q}")
-        actions = Nim.available_actions(state)
-        if epsilon == True:
-            percent = self.epsilon * 100            
-            # print(f"State:{state} Actions: {actions}")
-            if random.randrange(100) < percent:
-                return random.choice(tuple(actions))
+        if epsilon and random.random() < self.epsilon:
+            return Nim.random_action(state)
+
+        key, order = self.key(state)
+        values = self.q.get(key, dict())
+        best_action = None
+        best_value = -math.inf
+        for action, value in values.items():
+            if value > best_value:
+                best_action, best_value = action, value
+
+        # Actions without a Q-value count as 0, so prefer one of them
+        # over actions known to be worse
+        unseen = len(values) < sum(state)
+        if best_action is None or (best_value < 0 and unseen):
+            best_action = random.choice([
+                action for action in Nim.available_actions(key)
+                if action not in values
+            ])
+
+        # Map the action back from the order of the piles in the key
+        if order is not None:
+            k, j = best_action
+            return (order[k], j)
+        return best_action
+
+    def save(self, filename, initial=None):
+        """
+        Save the Q-table to `filename`, along with the hyperparameters
+        and the `initial` piles it was trained on (Nim's default piles
+        by default).
+
+        After a header, the file holds three arrays, each with one item
+        per Q-value: the state, numbered in mixed radix by its piles;
+        the action, numbered by its position among every action on the
+        initial piles (sorted, if states are canonical); and the
+        Q-value itself.
+        """
+        initial = list(initial or Nim().piles)
+        strides, offsets = numbering(
+            sorted(initial) if self.canonical else initial
+        )
+        states = array("Q")
+        actions = array("I")
+        values = array("d")
+        for state, state_values in self.q.items():
+            number = sum(pile * stride for pile, stride in zip(state, strides))
+            for (i, j), value in state_values.items():
+                states.append(number)
+                actions.append(offsets[i] + j - 1)
+                values.append(value)
+
+        with open(filename, "wb") as f:
+            f.write(struct.pack(
+                "<4sHdd?H", SNAPSHOT_MAGIC, SNAPSHOT_VERSION,
+                self.alpha, self.epsilon, self.canonical, len(initial)
+            ))
+            f.write(struct.pack(f"<{len(initial)}IQ", *initial, len(values)))
+            for column in (states, actions, values):
+                if sys.byteorder == "big":
+                    column.byteswap()
+                column.tofile(f)
 
-        
-        found = False
-        maxi = (-10000,None)
-        for s_a in self.q:
-            if tuple(state) == s_a[0] and self.q[s_a] > maxi[0]:
-                maxi = (self.q[s_a],s_a[1])
-                found = True
-        if found == True:
-            return maxi[1]
-        else:                
-            return random.choice(tuple(actions))             
+    @classmethod
+    def load(cls, filename, initial=None, alpha=0.5, epsilon=0.1,
+             canonical=False):
+        """
+        Load an AI from a snapshot saved by `save`. Raise ValueError if
+        the file is not a complete snapshot, or if the snapshot was not
+        taken of an AI with the given `alpha`, `epsilon` and `canonical`,
+        trained on the `initial` piles (Nim's default piles by default).
+        """
+        initial = list(initial or Nim().piles)
+        with open(filename, "rb") as f:
+            try:
+                magic, version, *hyperparameters, count = struct.unpack(
+                    "<4sHdd?H", f.read(struct.calcsize("<4sHdd?H"))
+                )
+                if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                    raise ValueError(f"{filename} is not a Q-table snapshot")
+                *piles, size = struct.unpack(
+                    f"<{count}IQ", f.read(struct.calcsize(f"<{count}IQ"))
+                )
+            except struct.error:
+                raise ValueError(f"{filename} is truncated") from None
+            if (piles != initial
+                    or hyperparameters != [alpha, epsilon, canonical]):
+                saved_alpha, saved_epsilon, saved_canonical = hyperparameters
+                raise ValueError(
+                    f"{filename} was trained on piles {piles} with "
+                    f"alpha {saved_alpha}, epsilon {saved_epsilon} and "
+                    f"canonical {saved_canonical}"
+                )
 
+            columns = [array("Q"), array("I"), array("d")]
+            for column in columns:
+                try:
+                    column.fromfile(f, size)
+                except (EOFError, ValueError):
+                    raise ValueError(f"{filename} is truncated") from None
+                if sys.byteorder == "big":
+                    column.byteswap()
+
+        # Decode states and actions from their numbers
+        bounds = sorted(initial) if canonical else initial
+        strides, offsets = numbering(bounds)
+        actions = [(i, j) for i, pile in enumerate(bounds)
+                   for j in range(1, pile + 1)]
+        if any(action >= len(actions) for action in columns[1]):
+            raise ValueError(f"{filename} holds an unknown action")
+        ai = cls(alpha, epsilon, canonical)
+        states = dict()
+        for number, action, value in zip(*columns):
+            if number not in states:
+                states[number] = tuple(
+                    number // stride % (pile + 1)
+                    for pile, stride in zip(bounds, strides)
+                )
+            ai.q.setdefault(states[number], dict())[actions[action]] = value
+        return ai
 
 
-        # raise NotImplementedError
+def numbering(initial):
+    """
+    Return the strides by which states are numbered in mixed radix,
+    and the offsets by which actions on each pile are numbered, for
+    games starting from the `initial` piles: state `piles` is number
+    sum(piles[i] * strides[i]), and action `(i, j)` is number
+    offsets[i] + j - 1.
+    """
+    strides = [math.prod(pile + 1 for pile in initial[i + 1:])
+               for i in range(len(initial))]
+    offsets = [sum(initial[:i]) for i in range(len(initial))]
+    return strides, offsets
 
 
-def train(n):
+def train(n, batch=None, player=None, initial=None):
     """
-    Train an AI by playing `n` games against itself.
+    Train an AI by playing `n` games against itself, starting from
+    the `initial` piles (Nim's default piles by default).
+    If `batch` is given, play that many games at a time with
+    `train_batch` instead of one at a time. If `player` is given,
+    resume training that AI instead of a new one.
     """
+    if batch is not None:
+        return train_batch(n, batch, player=player, initial=initial)
 
-    player = NimAI()
+    player = player or NimAI()
 
     # Play n games
     for i in range(n):
         print(f"Playing training game {i + 1}")
-        game = Nim()
+        train_game(player, initial)
 
-        # Keep track of last move made by either player
-        last = {
-            0: {"state": None, "action": None},
-            1: {"state": None, "action": None}
-        }
+    print("Done training")
 
-        # Game loop
-        while True:
-
-            # Keep track of current state and action
-            state = game.piles.copy()
-            action = player.choose_action(game.piles)
-
-            # Keep track of last state and action
-            last[game.player]["state"] = state
-            last[game.player]["action"] = action
-
-            # Make move
-            game.move(action)
-            new_state = game.piles.copy()
-
-            # When game is over, update Q values with rewards
-            if game.winner is not None:
-                player.update(state, action, new_state, -1)
-                player.update(
-                    last[game.player]["state"],
-                    last[game.player]["action"],
-                    new_state,
-                    1
-                )
-                break
-
-            # If game is continuing, no rewards yet
-            elif last[game.player]["state"] is not None:
-                player.update(
-                    last[game.player]["state"],
-                    last[game.player]["action"],
-                    new_state,
-                    0
-                )
+    # Return the trained AI
+    return player
 
-    print("Done training")
+
+def train_game(player, initial=None):
+    """
+    Play one game of `player` against itself, updating its Q-values,
+    starting from the `initial` piles (Nim's default piles by default).
+    """
+    game = Nim(initial)
+
+    # Keep track of last move made by either player
+    last = {
+        0: {"state": None, "action": None},
+        1: {"state": None, "action": None}
+    }
+
+    # Game loop
+    while True:
+
+        # Keep track of current state and action
+        state = game.piles.copy()
+        action = player.choose_action(game.piles)
+
+        # Keep track of last state and action
+        last[game.player]["state"] = state
+        last[game.player]["action"] = action
+
+        # Make move
+        game.move(action)
+        new_state = game.piles.copy()
+
+        # When game is over, update Q values with rewards
+        if game.winner is not None:
+            player.update(state, action, new_state, -1)
+            player.update(
+                last[game.player]["state"],
+                last[game.player]["action"],
+                new_state,
+                1
+            )
+            break
+
+        # If game is continuing, no rewards yet
+        elif last[game.player]["state"] is not None:
+            player.update(
+                last[game.player]["state"],
+                last[game.player]["action"],
+                new_state,
+                0
+            )
+
+
+def train_batch(n, batch=256, report=1.0, seed=None, player=None,
+                initial=None):
+    """
+    Train an AI by playing `n` games against itself, `batch` games
+    at a time in lockstep with NumPy: each step chooses a move in
+    every game at once and updates the Q-values of all of them, and
+    a game that ends is replaced by a new one until `n` have been
+    played. Prints progress every `report` seconds instead of a line
+    per game, and returns a `NimAI` like the one `train` returns
+    (resuming the training of `player`, if given). The Q-table is
+    dense, with a row for every state reachable from the `initial`
+    piles, so this suits small configurations.
+
+    Games in a batch choose their moves from the same Q-values, so
+    each update reaches the other games a step late. With large
+    batches, the AI therefore needs more games than `train` to play
+    as well.
+    """
+    import numpy as np
+
+    player = player or NimAI()
+    if player.canonical:
+        raise ValueError("train_batch does not support canonical states")
+    rng = np.random.default_rng(seed)
+    initial = Nim(initial).piles
+    start_time = time.perf_counter()
+
+    # Number states by their piles in mixed radix, so that removing
+    # `j` objects from pile `i` subtracts `j * strides[i]`, and
+    # number actions by their position in `actions`
+    strides, _ = numbering(initial)
+    start = sum(p * stride for p, stride in zip(initial, strides))
+    actions = [(i, j) for i, pile in enumerate(initial)
+               for j in range(1, pile + 1)]
+    action_piles = np.array([i for i, _ in actions])
+    action_counts = np.array([j for _, j in actions])
+    deltas = action_counts * np.array(strides)[action_piles]
+    state_piles = (
+        np.arange(start + 1)[:, None] // np.array(strides)
+        % (np.array(initial) + 1)
+    )
+    valid = state_piles[:, action_piles] >= action_counts
+
+    # Dense Q-table, and which of its entries have been updated
+    q = np.zeros((start + 1, len(actions)))
+    visited = np.zeros(q.shape, dtype=bool)
+    numbers = {action: number for number, action in enumerate(actions)}
+    for piles, values in player.q.items():
+        state = sum(pile * stride for pile, stride in zip(piles, strides))
+        for action, value in values.items():
+            q[state, numbers[action]] = value
+            visited[state, numbers[action]] = True
+
+    def learn(states, moves, reward, future):
+
+        # Several games may update the same Q-value in one step, so
+        # apply the updates in rounds of distinct Q-values, one after
+        # another as sequential training would
+        targets = np.broadcast_to(reward + future, states.shape)
+        pending = np.arange(len(states))
+        while len(pending):
+            _, first = np.unique(
+                states[pending] * len(actions) + moves[pending],
+                return_index=True
+            )
+            now = pending[first]
+            old = q[states[now], moves[now]]
+            q[states[now], moves[now]] = old + player.alpha * (
+                targets[now] - old
+            )
+            visited[states[now], moves[now]] = True
+            pending = np.delete(pending, first)
+
+    # State of each game being played, the player to move in it,
+    # and the last state and action of each player (-1 for none)
+    batch = min(batch, n)
+    current = np.full(batch, start)
+    mover = np.zeros(batch, dtype=int)
+    last_state = np.full((batch, 2), -1)
+    last_action = np.full((batch, 2), -1)
+    active = np.zeros(batch, dtype=bool)
+    filled = 0
+    started = 0
+    completed = 0
+    last_report = start_time
+
+    while active.any() or (filled < batch and started < n):
+
+        # Start a game in one more slot each step until the batch is
+        # full, so that games are spread over different states rather
+        # than all choosing the same moves from the initial piles at
+        # once. `filled` counts the slots in use, and `started` the
+        # games, including those restarted in slots that finished.
+        if filled < batch and started < n:
+            active[filled] = True
+            filled += 1
+            started += 1
+
+        games = np.flatnonzero(active)
+        states = current[games]
+        players = mover[games]
+        others = 1 - players
+        legal = valid[states]
+
+        # Choose epsilon-greedy actions, breaking ties at random
+        values = np.where(legal, q[states], -np.inf)
+        best = values.max(axis=1, keepdims=True)
+        greedy = np.where(
+            values == best, rng.random(values.shape), -1
+        ).argmax(axis=1)
+        explore = np.where(
+            legal, rng.random(values.shape), -1
+        ).argmax(axis=1)
+        moves = np.where(
+            rng.random(len(games)) < player.epsilon, explore, greedy
+        )
+
+        # Keep track of last state and action, and make moves
+        previous_states = last_state[games, others]
+        previous_actions = last_action[games, others]
+        last_state[games, players] = states
+        last_action[games, players] = moves
+        new_states = states - deltas[moves]
+        done = new_states == 0
+
+        # When a game is over, the player who moved loses and the
+        # other wins; otherwise, the other player's last move gets
+        # no reward yet
+        future = np.where(
+            valid[new_states], q[new_states], -np.inf
+        ).max(axis=1)
+        future[done] = 0
+        learn(states[done], moves[done], -1, 0)
+        won = done & (previous_states >= 0)
+        learn(previous_states[won], previous_actions[won], 1, 0)
+        going = ~done & (previous_states >= 0)
+        learn(
+            previous_states[going], previous_actions[going], 0,
+            future[going]
+        )
+        current[games] = new_states
+        mover[games] = others
+
+        # Start new games in place of finished ones
+        finished = games[done]
+        completed += len(finished)
+        restarted = finished[:n - started]
+        started += len(restarted)
+        current[restarted] = start
+        mover[restarted] = 0
+        last_state[restarted] = -1
+        last_action[restarted] = -1
+        active[finished[len(restarted):]] = False
+
+        now = time.perf_counter()
+        if report is not None and now - last_report >= report:
+            rate = completed / (now - start_time)
+            print(f"Played {completed} of {n} games ({rate:.0f} games/s)")
+            last_report = now
+
+    # Copy the Q-values that were learned into the AI
+    for state, move in zip(*np.nonzero(visited)):
+        piles = tuple(int(pile) for pile in state_piles[state])
+        player.q.setdefault(piles, dict())[actions[move]] = float(
+            q[state, move]
+        )
+
+    elapsed = time.perf_counter() - start_time
+    print(f"Done training {n} games in {elapsed:.2f}s "
+          f"({n / elapsed:.0f} games/s)")
 
     # Return the trained AI
     return player
 
 
-def play(ai, human_player=None):
+# Ways of merging the Q-tables of workers in `train_parallel`
+MERGES = ("average", "visits")
+
+
+def train_parallel(n, processes=None, rounds=10, merge="visits", seed=None,
+                   player=None, initial=None):
+    """
+    Train an AI by playing `n` games against itself in a pool of
+    `processes` workers (one per CPU by default).
+
+    The games are played in `rounds`: in each round, every worker
+    trains its own copy of the AI's Q-table on its share of the
+    round's games, and the copies are merged back into the AI, either
+    averaging each Q-value over the workers ("average") or weighting
+    them by how often each worker updated it ("visits"). Each worker
+    plays its own stream of random games, seeded from `seed`. If
+    `player` is given, resume training that AI instead of a new one.
+    Games start from the `initial` piles (Nim's default by default).
+    """
+    if merge not in MERGES:
+        raise ValueError(f"merge must be one of {MERGES}")
+    processes = processes or os.cpu_count()
+    player = player or NimAI()
+    executor = ProcessPoolExecutor(
+        processes, initializer=_init_worker,
+        initargs=(player.alpha, player.epsilon, player.canonical)
+    )
+    with executor:
+        for r in range(rounds):
+            games = n * (r + 1) // rounds - n * r // rounds
+            futures = [
+                executor.submit(
+                    _train_share, player.q,
+                    games * (w + 1) // processes - games * w // processes,
+                    None if seed is None else f"{seed}:{r}:{w}", initial
+                )
+                for w in range(processes)
+            ]
+            results = [future.result() for future in futures]
+            player.q = merge_q(results, merge)
+    return player
+
+
+def merge_q(results, merge="visits"):
+    """
+    Merge a list of (q, visits) pairs of Q-tables and counts of
+    updates to each of their Q-values, as described in
+    `train_parallel`. Q-values no worker updated are averaged.
+    """
+    totals = dict()
+    for q, visits in results:
+        for state, values in q.items():
+            counts = visits.get(state, dict())
+            state_totals = totals.setdefault(state, dict())
+            for action, value in values.items():
+                weight = counts.get(action, 0) if merge == "visits" else 1
+                total = state_totals.setdefault(action, [0, 0, 0, 0])
+                total[0] += weight * value
+                total[1] += weight
+                total[2] += value
+                total[3] += 1
+
+    return {
+        state: {
+            action: weighted / weight if weight else plain / count
+            for action, (weighted, weight, plain, count)
+            in state_totals.items()
+        }
+        for state, state_totals in totals.items()
+    }
+
+
+# AI trained in a worker process of `train_parallel`, along with
+# how often it updated each Q-value
+_worker = dict()
+
+
+def _init_worker(alpha, epsilon, canonical):
+    player = NimAI(alpha, epsilon, canonical)
+    visits = dict()
+    update_q_value = player.update_q_value
+
+    def counting_update_q_value(state, action, *args):
+        key, order = player.key(state)
+        counts = visits.setdefault(key, dict())
+        action_key = player.action_key(order, action)
+        counts[action_key] = counts.get(action_key, 0) + 1
+        update_q_value(state, action, *args)
+
+    player.update_q_value = counting_update_q_value
+    _worker.update(player=player, visits=visits)
+
+
+def _train_share(q, games, seed, initial):
+    """Train a copy of `q` on `games` games. Runs in a worker process."""
+    random.seed(seed)
+    player = _worker["player"]
+    player.q = {state: dict(values) for state, values in q.items()}
+    _worker["visits"].clear()
+    for _ in range(games):
+        train_game(player, initial)
+    return player.q, _worker["visits"]
+
+
+def winning(piles):
+    """
+    Return True if the player to move wins against any play from
+    `piles`, where the player who takes the last object loses. With
+    at least two piles of more than one object, those are the states
+    whose pile sizes XOR (their nim-sum) to a nonzero number; after
+    that, the states with an even number of piles of one object.
+    """
+    if sum(1 for pile in piles if pile > 1) >= 2:
+        nim_sum = 0
+        for pile in piles:
+            nim_sum ^= pile
+        return nim_sum != 0
+    if any(pile > 1 for pile in piles):
+        return True
+    return sum(piles) % 2 == 0
+
+
+def optimal_action(piles):
+    """
+    Return an action that wins against any play from `piles`, where
+    the player who takes the last object loses, or None if there is
+    none. With at least two piles of more than one object, that is an
+    action leaving piles whose sizes XOR (their nim-sum) to 0; after
+    that, it leaves an odd number of piles of one object.
+    """
+    large = [i for i, pile in enumerate(piles) if pile > 1]
+    ones = sum(1 for pile in piles if pile == 1)
+
+    # Endgame: leave an odd number of piles of one object
+    if len(large) == 1:
+        i = large[0]
+        return (i, piles[i]) if ones % 2 == 1 else (i, piles[i] - 1)
+    if not large:
+        if ones % 2 == 1 or ones == 0:
+            return None
+        return (piles.index(1), 1)
+
+    nim_sum = 0
+    for pile in piles:
+        nim_sum ^= pile
+    if nim_sum == 0:
+        return None
+    for i, pile in enumerate(piles):
+        if pile ^ nim_sum < pile:
+            return (i, pile - (pile ^ nim_sum))
+
+
+def play(ai, human_player=None, initial=None):
     """
-    Play human game against the AI.
+    Play human game against the AI, starting from the `initial`
+    piles (Nim's default piles by default).
     `human_player` can be set to 0 or 1 to specify whether
     human player moves first or second.
     """
@@ -265,7 +768,7 @@ def play(ai, human_player=None):
         human_player = random.randint(0, 1)
 
     # Create new game
-    game = Nim()
+    game = Nim(initial)
 
     # Game loop
     while True:
@@ -277,8 +780,6 @@ def play(ai, human_player=None):
             print(f"Pile {i}: {pile}")
         print()
 
-        # Compute available actions
-        available_actions = Nim.available_actions(game.piles)
         time.sleep(1)
 
         # Let human make a move
@@ -287,7 +788,8 @@ def play(ai, human_player=None):
             while True:
                 pile = int(input("Choose Pile: "))
                 count = int(input("Choose Count: "))
-                if (pile, count) in available_actions:
+                valid_pile = 0 <= pile < len(game.piles)
+                if valid_pile and 1 <= count <= game.piles[pile]:
                     break
                 print("Invalid move, try again.")
 
@@ -1,4 +1,13 @@
-from nim import train, play
+import os
 
-ai = train(10000)
+from nim import NimAI, train, play
+
+# Snapshot of the trained AI, so that it is only trained once
+SNAPSHOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nim.q")
+
+try:
+    ai = NimAI.load(SNAPSHOT)
+except (FileNotFoundError, ValueError):
+    ai = train(10000)
+    ai.save(SNAPSHOT)
 play(ai)
@@ -0,0 +1,47 @@
+import sys
+
+import tictactoe as ttt
+
+
+def build():
+    """
+    Solve every position reachable from the empty 3x3 board. Return the
+    contents of the opening book, as described at `tictactoe.BOOK_FILE`.
+    """
+    entries = bytearray([ttt.NO_ENTRY]) * 3 ** 9
+    frontier = [ttt.initial_state()]
+    seen = set(frontier)
+    while frontier:
+        board = frontier.pop()
+        if ttt.terminal(board):
+            continue
+
+        # Search to the end of the game, converting the value for the
+        # player to move into the utility for X
+        search = ttt.Search(board)
+        cell = search.run()
+        utility = (search.value > 0) - (search.value < 0)
+        if ttt.player(board) == ttt.O:
+            utility = -utility
+        index = ttt.TERNARY[board.x] + 2 * ttt.TERNARY[board.o]
+        entries[index] = cell | (utility + 1) << 4
+
+        for action in ttt.actions(board):
+            child = ttt.result(board, action)
+            if child not in seen:
+                seen.add(child)
+                frontier.append(child)
+    return bytes(entries)
+
+
+def main():
+    filename = sys.argv[1] if len(sys.argv) > 1 else ttt.BOOK_FILE
+    entries = build()
+    with open(filename, "wb") as f:
+        f.write(entries)
+    positions = sum(entry != ttt.NO_ENTRY for entry in entries)
+    print(f"Wrote {positions} positions to {filename}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import argparse
+import random
+import sys
+import time
+
+import tictactoe as ttt
+
+# Kinds of player: minimax with its opening book, minimax searching every
+# move, and uniformly random moves
+PLAYERS = ("minimax", "search", "random")
+
+
+def choose(kind, board, rng, budget):
+    """
+    Return the move of a player of the given kind on the board.
+    """
+    if kind == "minimax":
+        return ttt.minimax(board, budget)
+    if kind == "search":
+        cell = ttt.Search(board, budget).run()
+        return divmod(cell, board.game.n)
+    return rng.choice(sorted(ttt.actions(board)))
+
+
+def benchmark(x, o, games, game=None, budget=ttt.BUDGET, seed=0):
+    """
+    Play `games` games between players of kinds `x` and `o`, starting from
+    empty boards of a Game (3x3 by default) with an empty transposition
+    table. Return a dict of the results and timings.
+    """
+    game = game or ttt.get_game()
+    game.table.clear()
+    for name in ttt.counts:
+        ttt.counts[name] = 0
+    rng = random.Random(seed)
+
+    results = {ttt.X: 0, ttt.O: 0, None: 0}
+    moves = 0
+
+    # Moves made by each side that is not a random player, and how many
+    # of those came from the opening book
+    ai_moves = {ttt.X: 0, ttt.O: 0}
+    book_moves = {ttt.X: 0, ttt.O: 0}
+    elapsed = 0
+    for _ in range(games):
+        board = ttt.Board(game=game)
+        while not ttt.terminal(board):
+            side = ttt.player(board)
+            kind = x if side == ttt.X else o
+            if kind != "random":
+                ai_moves[side] += 1
+                if kind == "minimax" and ttt.lookup(board) is not None:
+                    book_moves[side] += 1
+            start = time.perf_counter()
+            action = choose(kind, board, rng, budget)
+            elapsed += time.perf_counter() - start
+            board = ttt.result(board, action)
+            moves += 1
+        results[ttt.winner(board)] += 1
+
+    total_ai_moves = sum(ai_moves.values())
+    total_book_moves = sum(book_moves.values())
+    searched = total_ai_moves - total_book_moves
+    return {
+        "games": games,
+        "x wins": results[ttt.X],
+        "o wins": results[ttt.O],
+        "ties": results[None],
+        "moves": moves,
+        "seconds": elapsed,
+        "moves per second": moves / elapsed if elapsed else 0,
+        "ai moves": ai_moves,
+        "book moves": book_moves,
+        "book share": (total_book_moves / total_ai_moves
+                       if total_ai_moves else 0),
+        "nodes per move": ttt.counts["nodes"] / searched if searched else 0,
+        "table hit rate": (ttt.counts["hits"] / ttt.counts["lookups"]
+                           if ttt.counts["lookups"] else 0)
+    }
+
+
+def main():
+
+    # Parse command-line arguments
+    parser = argparse.ArgumentParser(
+        description="Benchmark the tictactoe AI by playing it against itself."
+    )
+    parser.add_argument(
+        "-n", "--games", type=int, default=1000,
+        help="number of games in each matchup"
+    )
+    parser.add_argument(
+        "--board", type=int, nargs=3, default=(3, 3, 3),
+        metavar=("M", "N", "K"),
+        help="play on M rows and N columns, with K in a row winning"
+    )
+    parser.add_argument(
+        "--budget", type=float, default=ttt.BUDGET,
+        help="seconds the AI may spend searching a move"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    game = ttt.get_game(*args.board)
+
+    matchups = [
+        (x, o) for x in PLAYERS for o in PLAYERS
+        if "random" in (x, o) or x == o
+    ]
+    print(f"{'x':<8} {'o':<8} {'games':>6} {'x wins':>6} {'o wins':>6} "
+          f"{'ties':>6} {'moves/s':>9} {'book':>6} {'nodes/move':>10} "
+          f"{'hit rate':>8}")
+    failures = []
+    for x, o in matchups:
+        stats = benchmark(x, o, args.games, game, args.budget, args.seed)
+        print(f"{x:<8} {o:<8} {stats['games']:>6} {stats['x wins']:>6} "
+              f"{stats['o wins']:>6} {stats['ties']:>6} "
+              f"{stats['moves per second']:>9.0f} "
+              f"{stats['book share']:>6.1%} "
+              f"{stats['nodes per move']:>10.1f} "
+              f"{stats['table hit rate']:>8.1%}")
+
+        # Perfect play on a 3x3 board always ties against itself and never
+        # loses against anyone
+        if game is not ttt.get_game():
+            continue
+        if "random" not in (x, o) and stats["ties"] != stats["games"]:
+            failures.append(f"{x} vs {o} did not always tie")
+        if x != "random" and stats["o wins"]:
+            failures.append(f"{x} lost to {o} as X")
+        if o != "random" and stats["x wins"]:
+            failures.append(f"{o} lost to {x} as O")
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
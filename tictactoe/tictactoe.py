@@ -2,78 +2,290 @@
 Tic Tac Toe Player
 """
 
-import math
-import copy
+import functools
+import os
+import random
+import time
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Seconds `minimax` may spend on a move when it cannot search to the end
+BUDGET = 1.0
 
-def initial_state():
+# Boards with at most this many cells consider every empty cell as a move;
+# larger boards only consider cells next to ones already taken
+SMALL_BOARD = 16
+
+# Score of a won position, larger than any heuristic evaluation
+WIN = 10 ** 9
+
+# Number of positions a transposition table may hold before it is cleared
+TABLE_SIZE = 1 << 20
+
+
+class Game():
+    """
+    Geometry of an m,n,k-game: a board of m rows and n columns, on which
+    k marks in a row (horizontally, vertically or diagonally) win. Cell
+    (i, j) is bit n * i + j of a mask of cells.
+    """
+
+    def __init__(self, m=3, n=3, k=3):
+        if not (1 <= k <= max(m, n)):
+            raise ValueError("k must fit on the board")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.cells = m * n
+        self.full = (1 << self.cells) - 1
+
+        # Masks of every line of k cells in a row, and of the lines
+        # through each cell
+        self.lines = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if 0 <= end_i < m and 0 <= end_j < n:
+                        self.lines.append(sum(
+                            1 << self.index(i + di * d, j + dj * d)
+                            for d in range(k)
+                        ))
+        self.cell_lines = [
+            [line for line in self.lines if line >> cell & 1]
+            for cell in range(self.cells)
+        ]
+
+        # Whether each mask of one player's cells contains a line, for
+        # boards small enough to tabulate
+        self.winning = None
+        if self.cells <= 12:
+            self.winning = [self.has_line(mask)
+                            for mask in range(1 << self.cells)]
+
+        # Heuristic weight of an open line holding a number of one player's
+        # marks; see `Search.evaluate`
+        self.weights = [0] + [10 ** count for count in range(1, k)]
+
+        # Mask of the cells around each cell, and cells ordered from the
+        # center outwards, used to generate and order moves
+        self.neighbors = [
+            sum(1 << self.index(i + di, j + dj)
+                for di in (-1, 0, 1) for dj in (-1, 0, 1)
+                if (di or dj) and 0 <= i + di < m and 0 <= j + dj < n)
+            for i in range(m) for j in range(n)
+        ]
+        self.central = sorted(range(self.cells), key=lambda cell: (
+            abs(2 * (cell // n) - (m - 1)) + abs(2 * (cell % n) - (n - 1))
+        ))
+
+        # Symmetries of the board, each mapping every cell to its image,
+        # along with their inverses. Square boards have 8 (rotations and
+        # reflections), other boards 4.
+        transforms = [
+            lambda i, j: (i, j),
+            lambda i, j: (m - 1 - i, n - 1 - j),
+            lambda i, j: (m - 1 - i, j),
+            lambda i, j: (i, n - 1 - j)
+        ]
+        if m == n:
+            transforms += [
+                lambda i, j: (j, i),
+                lambda i, j: (n - 1 - j, m - 1 - i),
+                lambda i, j: (j, m - 1 - i),
+                lambda i, j: (n - 1 - j, i)
+            ]
+        self.symmetries = [
+            [self.index(*transform(cell // n, cell % n))
+             for cell in range(self.cells)]
+            for transform in transforms
+        ]
+        self.inverses = []
+        for symmetry in self.symmetries:
+            inverse = [0] * self.cells
+            for cell, image in enumerate(symmetry):
+                inverse[image] = cell
+            self.inverses.append(inverse)
+
+        # Zobrist keys: a random number for each player in each cell, so
+        # that a position hashes to the XOR of the keys of its marks
+        rng = random.Random(f"{m},{n},{k}")
+        self.zobrist = [
+            [rng.getrandbits(64) for _ in range(self.cells)]
+            for _ in (X, O)
+        ]
+
+        # Transposition table mapping canonical position hashes to
+        # (depth, value, kind, move); see `Search`
+        self.table = dict()
+
+    def index(self, i, j):
+        """Returns the bit index of cell (i, j)."""
+        return self.n * i + j
+
+    def has_line(self, mask):
+        """Returns True if a mask of cells contains k in a row."""
+        if self.winning is not None:
+            return self.winning[mask]
+        return any(mask & line == line for line in self.lines)
+
+    def won_at(self, mask, cell):
+        """Returns True if a mask of cells has k in a row through cell."""
+        return any(mask & line == line for line in self.cell_lines[cell])
+
+
+# Games created so far, by (m, n, k)
+games = dict()
+
+
+def get_game(m=3, n=3, k=3):
+    """
+    Returns the shared Game for boards of m rows, n columns and k in a row.
+    """
+    if (m, n, k) not in games:
+        games[m, n, k] = Game(m, n, k)
+    return games[m, n, k]
+
+
+class Board():
+    """
+    Board stored as two masks of the cells taken by X and by O, along with
+    the Game it is played in. Boards are immutable, and can be indexed like
+    the list of rows returned by the original `initial_state`, as in
+    board[i][j].
+    """
+
+    __slots__ = ("x", "o", "game")
+
+    def __init__(self, x=0, o=0, game=None):
+        self.x = x
+        self.o = o
+        self.game = game or get_game()
+
+    @classmethod
+    def from_rows(cls, rows, k=3):
+        """Returns the board with the cells of a list of rows."""
+        m = len(rows)
+        n = len(rows[0]) if rows else 0
+        x = o = 0
+        for i, row in enumerate(rows):
+            for j, cell in enumerate(row):
+                if cell == X:
+                    x |= 1 << (n * i + j)
+                elif cell == O:
+                    o |= 1 << (n * i + j)
+        return cls(x, o, get_game(m, n, min(k, max(m, n))))
+
+    def to_rows(self):
+        """Returns the board as a list of rows."""
+        return [list(row) for row in self]
+
+    def cell(self, index):
+        """Returns the contents of the cell at bit `index`."""
+        if self.x >> index & 1:
+            return X
+        if self.o >> index & 1:
+            return O
+        return EMPTY
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.game.m:
+            raise IndexError("board row out of range")
+        n = self.game.n
+        return tuple(self.cell(n * i + j) for j in range(n))
+
+    def __len__(self):
+        return self.game.m
+
+    def __iter__(self):
+        return (self[i] for i in range(self.game.m))
+
+    def __eq__(self, other):
+        return (isinstance(other, Board) and self.game is other.game
+                and self.x == other.x and self.o == other.o)
+
+    def __hash__(self):
+        return hash((self.x, self.o, self.game.m, self.game.n, self.game.k))
+
+    def __repr__(self):
+        return f"Board({self.x:#x}, {self.o:#x}, get_game({self.game.m}, " \
+               f"{self.game.n}, {self.game.k}))"
+
+
+def as_board(board):
+    """
+    Returns `board` as a Board, converting it from a list of rows (with
+    three in a row winning) if needed.
+    """
+    if isinstance(board, Board):
+        return board
+    return Board.from_rows(board)
+
+
+def initial_state(m=3, n=3, k=3):
     """
-    Returns starting state of the board.
+    Returns starting state of the board, with m rows and n columns, on
+    which k in a row wins.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return Board(game=get_game(m, n, k))
 
 
 def player(board):
     """
     Returns player who has the next turn on a board.
     """
-    countx=0
-    counto=0
-    for row in board:
-        for symbol in row:
-            if symbol == X:
-                countx+=1
-            elif symbol == O:
-                counto+=1
-    if countx > counto:
+    board = as_board(board)
+    if board.x.bit_count() > board.o.bit_count():
         return O
     else:
-        return X 
+        return X
 
 
 def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
-    actions = set()
-    for i in range(3):
-        for j in range(3):
-            if board[i][j] == EMPTY :
-                actions.add((i,j))
-    return actions         
+    board = as_board(board)
+    taken = board.x | board.o
+    return {
+        divmod(cell, board.game.n)
+        for cell in range(board.game.cells) if not taken >> cell & 1
+    }
 
 
 def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    # print(f"{action}")
-    if board[action[0]][action[1]] != EMPTY:
+    current = as_board(board)
+    i, j = action
+    if not (0 <= i < current.game.m and 0 <= j < current.game.n):
         raise ValueError
+    bit = 1 << current.game.index(i, j)
+    if (current.x | current.o) & bit:
+        raise ValueError
+    if player(current) == X:
+        new_board = Board(current.x | bit, current.o, current.game)
     else:
-        new_board = copy.deepcopy(board)
-        new_board[action[0]][action[1]] = player(board)
+        new_board = Board(current.x, current.o | bit, current.game)
 
+    # Boards given as lists of rows get lists of rows back
+    if not isinstance(board, Board):
+        return new_board.to_rows()
     return new_board
 
+
 def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    for i in range(3):
-        if board[i][0]==board[i][1] and board[i][1]==board[i][2] and board[i][0] != EMPTY:
-            return board[i][0]    
-    for j in range(3):
-        if board[0][j]==board[1][j] and board[1][j]==board[2][j] and board[0][j] != EMPTY:
-            return board[0][j]
-    if board[0][0] == board[1][1] == board[2][2] or board[2][0] == board[1][1] == board[0][2] and board[1][1] != EMPTY:
-        return board[1][1]              
+    board = as_board(board)
+    if board.game.has_line(board.x):
+        return X
+    if board.game.has_line(board.o):
+        return O
     return None
 
 
@@ -81,66 +293,279 @@ def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    if winner(board) != None:
-        return True
-    else:
-        for row in board:
-            for element in row:
-                if element == EMPTY:
-                    return False
-
-    return True
+    board = as_board(board)
+    return (board.x | board.o == board.game.full
+            or winner(board) is not None)
 
 
 def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    if winner(board) == X:
+    won = winner(board)
+    if won == X:
         return 1
-    elif winner(board) == O:
+    elif won == O:
         return -1
     else:
         return 0
 
-def minimax(board):
+
+# Kinds of value stored in the transposition table: exact values, and lower
+# or upper bounds from searches cut off by alpha-beta pruning
+EXACT = "exact"
+LOWER = "lower"
+UPPER = "upper"
+
+# Search statistics: positions searched, and table lookups and hits
+counts = {"nodes": 0, "lookups": 0, "hits": 0}
+
+
+def minimax(board, budget=BUDGET):
     """
     Returns the optimal action for the current player on the board.
+
+    Standard 3x3 boards are looked up in the opening book. Otherwise, the
+    search deepens iteratively, and returns as soon as it has searched to
+    the end of the game, or with the best action found once `budget`
+    seconds have passed (never giving up if `budget` is None).
     """
-    if(player(board)== X):
-        return Max(board)[0]
-    elif(player(board)== O):
-        return Min(board)[0]  
+    board = as_board(board)
+    if terminal(board):
+        return None
+    entry = lookup(board)
+    if entry is not None:
+        return entry[0]
+    cell = Search(board, budget).run()
+    return divmod(cell, board.game.n)
 
-def Max(board):
-    if(terminal(board)):
-        return (None,utility(board))
 
-    val = -2
-    optimal_action = ()
+# File holding the optimal move and value of every 3x3 position, written
+# by book.py. Byte 3-ary(X) + 2 * 3-ary(O) of the file describes the
+# position where X and O hold the cells in those masks, 3-ary(mask) being
+# the sum of 3 ** i over the cells i in a mask: it holds the cell of the
+# optimal move in its low four bits and the utility of the position plus 1
+# in the next two, or NO_ENTRY for terminal and unreachable positions.
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "book.bin")
+NO_ENTRY = 0xFF
+TERNARY = [sum(3 ** i for i in range(9) if mask >> i & 1)
+           for mask in range(1 << 9)]
+
+
+@functools.lru_cache(maxsize=None)
+def book():
+    """
+    Returns the contents of the opening book, read on first use, or None if
+    it has not been built.
+    """
+    try:
+        with open(BOOK_FILE, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
 
-    for action in actions(board):
-        if (Min(result(board,action))[1] > val):
-            val = Min(result(board,action))[1]
-            optimal_action = action
-            if val == 1:
+def lookup(board):
+    """
+    Returns (action, utility) from the opening book for a 3x3 board, or
+    None if the board is not in the book.
+    """
+    board = as_board(board)
+    entries = book()
+    if entries is None or board.game is not get_game():
+        return None
+    entry = entries[TERNARY[board.x] + 2 * TERNARY[board.o]]
+    if entry == NO_ENTRY:
+        return None
+    return divmod(entry & 0xF, 3), (entry >> 4) - 1
+
+
+class Timeout(Exception):
+    """Raised inside a search that has run out of time."""
+
+
+class Search():
+
+    # Number of nodes between checks of the clock
+    CLOCK_INTERVAL = 1024
+
+    def __init__(self, board, budget=None):
+        """
+        Prepare a search for the best move on a board, to be given up after
+        `budget` seconds.
+        """
+        self.game = board.game
+        self.masks = [board.x, board.o]
+        self.turn = 0 if player(board) == X else 1
+        self.deadline = None
+        if budget is not None:
+            self.deadline = time.perf_counter() + budget
+
+        # Zobrist hash of the position under each symmetry of the board;
+        # the smallest one identifies the position up to symmetry
+        self.hashes = [0] * len(self.game.symmetries)
+        for turn, mask in enumerate(self.masks):
+            for cell in range(self.game.cells):
+                if mask >> cell & 1:
+                    self.toggle(turn, cell)
+
+    def run(self):
+        """
+        Search deeper and deeper until the end of the game or the deadline.
+        Returns the cell of the best move found, and sets `value` to its
+        value for the player to move (None if no search finished).
+        """
+        empty = self.game.cells - (self.masks[0] | self.masks[1]).bit_count()
+        best = self.moves(None)[0]
+        self.value = None
+        for depth in range(1, empty + 1):
+            try:
+                value, best = self.negamax(depth, -WIN, WIN, None)
+            except Timeout:
                 break
-    
-    return (optimal_action,val)
+            self.value = value
 
-def Min(board):
-    if(terminal(board)):
-        return (None,utility(board))
+            # Stop once the outcome is proven or every move was searched
+            # to the end of the game
+            if abs(value) >= WIN or depth == empty:
+                break
+        return best
+
+    def toggle(self, turn, cell):
+        """Updates the hashes for a mark of `turn` added to or removed from
+        `cell`."""
+        keys = self.game.zobrist[turn]
+        for s, symmetry in enumerate(self.game.symmetries):
+            self.hashes[s] ^= keys[symmetry[cell]]
+
+    def play(self, cell):
+        self.masks[self.turn] |= 1 << cell
+        self.toggle(self.turn, cell)
+        self.turn ^= 1
+
+    def unplay(self, cell):
+        self.turn ^= 1
+        self.masks[self.turn] &= ~(1 << cell)
+        self.toggle(self.turn, cell)
+
+    def negamax(self, depth, alpha, beta, last):
+        """
+        Returns (value, move) for the player to move, searching `depth`
+        moves ahead, after the opponent played in cell `last` (None at the
+        root). Values are WIN for a win, -WIN for a loss, 0 for a tie, and
+        heuristic evaluations in between; values at or beyond the window
+        (alpha, beta) may only be bounds on the true value.
+        """
+        counts["nodes"] += 1
+        if (self.deadline is not None
+                and counts["nodes"] % Search.CLOCK_INTERVAL == 0
+                and time.perf_counter() > self.deadline):
+            raise Timeout()
 
-    val = 2
-    optimal_action = ()
+        # Only the opponent's last move can have ended the game
+        game = self.game
+        mine = self.masks[self.turn]
+        theirs = self.masks[self.turn ^ 1]
+        if last is not None and game.won_at(theirs, last):
+            return -WIN, None
+        if mine | theirs == game.full:
+            return 0, None
+        if depth == 0:
+            return self.evaluate(mine, theirs), None
 
-    for action in actions(board):
-        if (Max(result(board,action))[1] < val):
-            val = Max(result(board,action))[1]
-            optimal_action = action
-            if val == -1:
+        # Symmetric positions have the same value; moves are stored in the
+        # orientation whose hash identifies the position
+        key = min(self.hashes)
+        symmetry = self.hashes.index(key)
+        table_move = None
+        counts["lookups"] += 1
+        entry = game.table.get(key)
+        if entry is not None:
+            counts["hits"] += 1
+            stored_depth, value, kind, move = entry
+            if move is not None:
+                table_move = game.inverses[symmetry][move]
+            if stored_depth >= depth and last is not None:
+                if kind == EXACT:
+                    return value, table_move
+                elif kind == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value, table_move
+
+        original_alpha = alpha
+        best_value = -WIN - 1
+        best_move = None
+        for cell in self.moves(table_move):
+            self.play(cell)
+            try:
+                value = -self.negamax(depth - 1, -beta, -alpha, cell)[0]
+            finally:
+                self.unplay(cell)
+            if value > best_value:
+                best_value = value
+                best_move = cell
+            alpha = max(alpha, value)
+            if alpha >= beta:
                 break
 
-    return (optimal_action,val)
+        if best_value <= original_alpha:
+            kind = UPPER
+        elif best_value >= beta:
+            kind = LOWER
+        else:
+            kind = EXACT
+        if len(game.table) >= TABLE_SIZE:
+            game.table.clear()
+        game.table[key] = (
+            depth, best_value, kind, game.symmetries[symmetry][best_move]
+        )
+        return best_value, best_move
+
+    def moves(self, first):
+        """
+        Returns the cells to try moving in, best first: the move `first`
+        (usually from the transposition table), then cells with the most
+        taken neighbors, then cells nearest the center.
+        """
+        game = self.game
+        taken = self.masks[0] | self.masks[1]
+
+        # On large boards, only play next to cells already taken
+        if game.cells <= SMALL_BOARD or not taken:
+            allowed = game.full & ~taken
+        else:
+            allowed = 0
+            for cell in range(game.cells):
+                if taken >> cell & 1:
+                    allowed |= game.neighbors[cell]
+            allowed &= ~taken
+            if not allowed:
+                allowed = game.full & ~taken
+
+        cells = [cell for cell in game.central if allowed >> cell & 1]
+        cells.sort(
+            key=lambda cell: -(game.neighbors[cell] & taken).bit_count()
+        )
+        if first is not None and first in cells:
+            cells.remove(first)
+            cells.insert(0, first)
+        return cells
 
+    def evaluate(self, mine, theirs):
+        """
+        Returns a heuristic value of a position for the player to move,
+        counting the lines that each player could still complete, weighted
+        by how many marks that player already has in them.
+        """
+        weights = self.game.weights
+        score = 0
+        for line in self.game.lines:
+            if not line & theirs:
+                score += weights[(line & mine).bit_count()]
+            elif not line & mine:
+                score -= weights[(line & theirs).bit_count()]
+        return max(-WIN + 1, min(score, WIN - 1))